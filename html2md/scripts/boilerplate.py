@@ -0,0 +1,141 @@
+"""Per-domain boilerplate detection from repeated text blocks."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from config import (
+    BOILERPLATE_MAX_BLOCKS,
+    BOILERPLATE_MAX_DOMAINS,
+    BOILERPLATE_MAX_PAGES,
+    BOILERPLATE_MIN_PAGES,
+    BOILERPLATE_RATIO,
+)
+from models import ContentBlock
+from utils import file_lock, source_domain
+
+_DIGITS_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+# Digits are folded only in blocks where they are at most this share of the
+# letters and digits, so numbered rows, versions and dates keep distinct keys.
+_FOLD_MAX_DIGIT_SHARE = 0.15
+
+
+class BoilerplateIndex:
+    def __init__(
+        self,
+        index_dir: str | Path,
+        ratio: float = BOILERPLATE_RATIO,
+        min_pages: int = BOILERPLATE_MIN_PAGES,
+        max_blocks: int = BOILERPLATE_MAX_BLOCKS,
+        max_pages: int = BOILERPLATE_MAX_PAGES,
+        max_domains: int = BOILERPLATE_MAX_DOMAINS,
+    ) -> None:
+        self.index_dir = Path(index_dir)
+        self.ratio = ratio
+        self.min_pages = min_pages
+        self.max_blocks = max_blocks
+        self.max_pages = max_pages
+        self.max_domains = max_domains
+        self._domains: dict[str, dict] = {}
+        # Pages observed since load or the last save; save merges them into
+        # the files so concurrent runs do not overwrite each other's counts.
+        self._pending: dict[str, list[tuple[str, set[str]]]] = {}
+
+    def observe(self, url: str, blocks: list[ContentBlock]) -> None:
+        domain = source_domain(url)
+        page_key = _digest(url)
+        keys = {block_key(block.text) for block in blocks}
+        if self._apply(self._load(domain), page_key, keys):
+            self._pending.setdefault(domain, []).append((page_key, keys))
+
+    def is_boilerplate(self, url: str, text: str) -> bool:
+        state = self._load(source_domain(url))
+        page_count = state["page_count"]
+        if page_count < self.min_pages:
+            return False
+        count = state["blocks"].get(block_key(text), 0)
+        return count / page_count >= self.ratio
+
+    def strip(self, url: str, blocks: list[ContentBlock]) -> list[ContentBlock]:
+        kept = [block for block in blocks if not self.is_boilerplate(url, block.text)]
+        return kept if kept else blocks
+
+    def save(self) -> None:
+        if not self._pending:
+            return
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.index_dir / "index.lock"):
+            for domain, observations in self._pending.items():
+                state = self._read(domain)
+                for page_key, keys in observations:
+                    self._apply(state, page_key, keys)
+                path = self._path(domain)
+                tmp_path = path.with_name(path.name + ".tmp")
+                tmp_path.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+                tmp_path.replace(path)
+                self._domains[domain] = state
+            self._pending = {}
+            self._evict()
+
+    def _apply(self, state: dict, page_key: str, keys: set[str]) -> bool:
+        if page_key in state["pages"]:
+            return False
+        state["pages"].append(page_key)
+        del state["pages"][: -self.max_pages]
+        state["page_count"] += 1
+        counts = state["blocks"]
+        for key in keys:
+            counts[key] = counts.get(key, 0) + 1
+        if len(counts) > self.max_blocks:
+            keep = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+            state["blocks"] = dict(keep[: self.max_blocks * 3 // 4])
+        return True
+
+    def _load(self, domain: str) -> dict:
+        state = self._domains.get(domain)
+        if state is None:
+            state = self._domains[domain] = self._read(domain)
+        return state
+
+    def _read(self, domain: str) -> dict:
+        state = {"page_count": 0, "pages": [], "blocks": {}}
+        path = self._path(domain)
+        if path.exists():
+            try:
+                state.update(json.loads(path.read_text(encoding="utf-8")))
+            except ValueError:
+                pass
+        return state
+
+    def _path(self, domain: str) -> Path:
+        return self.index_dir / f"{domain}.json"
+
+    def _evict(self) -> None:
+        entries = [entry for entry in os.scandir(self.index_dir) if entry.name.endswith(".json")]
+        overflow = len(entries) - self.max_domains
+        if overflow <= 0:
+            return
+        for entry in sorted(entries, key=lambda item: item.stat().st_mtime)[:overflow]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+
+
+def block_key(text: str) -> str:
+    # Digits are folded in mostly textual blocks, so "© 2023 Example Inc. All
+    # rights reserved." and its 2024 version share a key.
+    normalized = _SPACE_RE.sub(" ", text.lower()).strip()
+    digits = sum(char.isdigit() for char in normalized)
+    if digits and digits <= _FOLD_MAX_DIGIT_SHARE * sum(char.isalnum() for char in normalized):
+        normalized = _DIGITS_RE.sub("0", normalized)
+    return _digest(normalized)
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=8).hexdigest()
@@ -0,0 +1,224 @@
+"""Packed output bundles: rolling tar segments with an SQLite offset index."""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import sqlite3
+import sys
+import tarfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from config import BUNDLE_DIRNAME, BUNDLE_SEGMENT_MAX_BYTES
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    name TEXT PRIMARY KEY,
+    end_offset INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    url TEXT PRIMARY KEY,
+    base_name TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    members TEXT NOT NULL,
+    added_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_base_name ON documents (base_name);
+"""
+_URL_PAX_KEY = "comment"
+
+
+class Bundle:
+    """Appends documents with their files to tar segments and reads them back by canonical URL.
+
+    Each document's members keep their per-file layout paths (``<name>.md``,
+    ``<name>.json``, ``<name>.chunks.json``, ``media/<file>``). The index maps
+    the canonical URL to the segment and to the data offset and size of every
+    member, so a lookup is one SQLite query plus one seek per member. Segments
+    stay valid tar files, and every member carries the URL in a pax header.
+    """
+
+    def __init__(self, bundle_dir: str | Path, segment_max_bytes: int = BUNDLE_SEGMENT_MAX_BYTES) -> None:
+        self.bundle_dir = Path(bundle_dir)
+        self.bundle_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.conn = sqlite3.connect(str(self.bundle_dir / "index.sqlite"), timeout=30)
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "Bundle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def unique_base_name(self, base_name: str, url: str) -> str:
+        # Mirrors the -2, -3 suffixes of the per-file layout; a re-run keeps its name.
+        row = self.conn.execute("SELECT base_name FROM documents WHERE url = ?", (url,)).fetchone()
+        if row:
+            return row[0]
+        candidate, counter = base_name, 2
+        while self.conn.execute("SELECT 1 FROM documents WHERE base_name = ?", (candidate,)).fetchone():
+            candidate = f"{base_name}-{counter}"
+            counter += 1
+        return candidate
+
+    def add(self, url: str, base_name: str, files: dict[str, bytes | Path]) -> dict:
+        """Append one document; ``files`` maps member paths to contents or source files."""
+        payloads = {name: _read(data) for name, data in files.items()}
+        size = sum(len(data) + 2 * tarfile.BLOCKSIZE for data in payloads.values())
+        with self._locked():
+            segment, end_offset = self._writable_segment(size)
+            path = self.bundle_dir / segment
+            members: dict[str, list[int]] = {}
+            with open(path, "r+b" if path.exists() else "w+b") as f:
+                f.seek(end_offset)
+                tar = tarfile.TarFile(fileobj=f, mode="w", format=tarfile.PAX_FORMAT)
+                now = time.time()
+                for name, data in payloads.items():
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    info.mtime = int(now)
+                    info.pax_headers = {_URL_PAX_KEY: url}
+                    tar.addfile(info, io.BytesIO(data))
+                    padded = -(-len(data) // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                    members[name] = [tar.offset - padded, len(data)]
+                end_offset = tar.offset
+                tar.close()
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO segments (name, end_offset) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET end_offset = excluded.end_offset",
+                    (segment, end_offset),
+                )
+                self.conn.execute(
+                    "INSERT INTO documents (url, base_name, segment, members, added_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(url) DO UPDATE SET base_name = excluded.base_name, segment = excluded.segment, "
+                    "members = excluded.members, added_at = excluded.added_at",
+                    (url, base_name, segment, json.dumps(members), now),
+                )
+        return {"url": url, "base_name": base_name, "segment": str(path), "members": sorted(members)}
+
+    def get(self, url: str) -> dict | None:
+        row = self.conn.execute(
+            "SELECT base_name, segment, members FROM documents WHERE url = ?", (url,)
+        ).fetchone()
+        if not row:
+            return None
+        return {"url": url, "base_name": row[0], "segment": row[1], "members": json.loads(row[2])}
+
+    def read(self, url: str, member: str | None = None) -> bytes | None:
+        """Read one member of a document, by default its markdown."""
+        entry = self.get(url)
+        if entry is None:
+            return None
+        name = member or f"{entry['base_name']}.md"
+        if name not in entry["members"]:
+            return None
+        offset, size = entry["members"][name]
+        with open(self.bundle_dir / entry["segment"], "rb") as f:
+            f.seek(offset)
+            return f.read(size)
+
+    def urls(self) -> Iterator[str]:
+        for (url,) in self.conn.execute("SELECT url FROM documents ORDER BY added_at"):
+            yield url
+
+    def export(self, output_dir: str | Path, urls: list[str] | None = None) -> dict[str, int]:
+        """Write documents back into the per-file layout under ``output_dir``."""
+        output_path = Path(output_dir)
+        documents = files = 0
+        for url in urls or list(self.urls()):
+            entry = self.get(url)
+            if entry is None:
+                continue
+            with open(self.bundle_dir / entry["segment"], "rb") as f:
+                for name, (offset, size) in entry["members"].items():
+                    target = output_path / name
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    f.seek(offset)
+                    target.write_bytes(f.read(size))
+                    files += 1
+            documents += 1
+        return {"documents": documents, "files": files}
+
+    def stats(self) -> dict[str, int]:
+        documents = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        segments = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(end_offset), 0) FROM segments").fetchone()
+        return {"documents": documents, "segments": segments[0], "bytes": segments[1]}
+
+    def _writable_segment(self, size: int) -> tuple[str, int]:
+        row = self.conn.execute("SELECT name, end_offset FROM segments ORDER BY name DESC LIMIT 1").fetchone()
+        if row and (row[1] == 0 or row[1] + size <= self.segment_max_bytes):
+            return row[0], row[1]
+        number = int(row[0].split("-")[1].split(".")[0]) + 1 if row else 1
+        return f"segment-{number:05d}.tar", 0
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.bundle_dir / "bundle.lock", "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read(data: bytes | Path) -> bytes:
+    return data if isinstance(data, bytes) else Path(data).read_bytes()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect and export html2md output bundles.")
+    parser.add_argument("--out", required=True, help="Output directory passed to pipeline --bundle")
+    sub = parser.add_subparsers(dest="command", required=True)
+    get = sub.add_parser("get", help="Print one member of a document")
+    get.add_argument("--url", required=True, help="Canonical URL")
+    get.add_argument("--member", default=None, help="Member path (default: the markdown file)")
+    export = sub.add_parser("export", help="Write documents back into the per-file layout")
+    export.add_argument("--to", required=True, help="Destination directory")
+    export.add_argument("--url", action="append", default=None, help="Only export this URL (repeatable)")
+    sub.add_parser("list", help="List bundled URLs")
+    sub.add_parser("stats", help="Print document, segment and byte counts")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    bundle_dir = Path(args.out) / BUNDLE_DIRNAME
+    if not (bundle_dir / "index.sqlite").exists():
+        raise SystemExit(f"No bundle found in {bundle_dir}")
+    with Bundle(bundle_dir) as bundle:
+        if args.command == "get":
+            data = bundle.read(args.url, args.member)
+            if data is None:
+                raise SystemExit(f"Not in bundle: {args.url} {args.member or ''}".rstrip())
+            sys.stdout.buffer.write(data)
+        elif args.command == "export":
+            print(json.dumps(bundle.export(args.to, args.url)))
+        elif args.command == "list":
+            for url in bundle.urls():
+                print(url)
+        else:
+            print(json.dumps(bundle.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Size bound for on-disk caches, with a persisted running total of their bytes."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from utils import file_lock
+
+_USAGE_NAME = "usage"
+# Eviction frees down to this share of max_bytes so the next scan is far off.
+_LOW_WATER = 0.9
+
+
+class CacheBudget:
+    """Keeps the ``*suffix`` files of a sharded cache directory under ``max_bytes``.
+
+    Writers report the size change of each entry. The total is kept in a
+    small file next to the shards, so the directory is only scanned when the
+    total is unknown or over budget; the scan then evicts least recently
+    used entries (by mtime) down to 90% of the budget and stores the exact
+    total again.
+    """
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int, suffix: str) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+
+    def replace(self, tmp_path: Path, path: Path) -> None:
+        """Move a freshly written entry into place and account for its size."""
+        old_size = _size(path)
+        new_size = tmp_path.stat().st_size
+        tmp_path.replace(path)
+        self.record(new_size - old_size)
+
+    def record(self, delta: int) -> None:
+        if self.max_bytes <= 0:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.cache_dir / f"{_USAGE_NAME}.lock"):
+            total = self._read_total()
+            # An unknown total is measured once; the scan already sees this write.
+            total = self._scan_total() if total is None else total + delta
+            if total > self.max_bytes:
+                total = self._evict()
+            self._write_total(total)
+
+    def _read_total(self) -> int | None:
+        try:
+            return int((self.cache_dir / _USAGE_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write_total(self, total: int) -> None:
+        path = self.cache_dir / _USAGE_NAME
+        tmp_path = path.with_name(f"{_USAGE_NAME}.tmp")
+        tmp_path.write_text(str(max(0, total)), encoding="utf-8")
+        tmp_path.replace(path)
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_total(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> int:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * _LOW_WATER)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
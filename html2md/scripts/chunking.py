@@ -0,0 +1,121 @@
+"""Token-bounded chunk manifests and budgeted digests for summarization."""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+
+from config import CHUNK_EXCERPTS, CHUNK_MAX_TOKENS, CHUNK_MIN_EXCERPT_TOKENS
+from models import ChunkInfo, ChunkManifest, ContentBlock
+
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]")
+_WORD_RE = re.compile(r"\w+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was",
+    "were", "will", "with",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly one token per CJK character and per four characters otherwise.
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def score_blocks(blocks: list[ContentBlock], topic: str | None = None) -> list[ContentBlock]:
+    words_per_block = [_content_words(block.text) for block in blocks]
+    frequencies = Counter(word for words in words_per_block for word in set(words))
+    topic_words = set(_content_words(topic or ""))
+    scored: list[ContentBlock] = []
+    for position, (block, words) in enumerate(zip(blocks, words_per_block)):
+        if block.score is not None:
+            scored.append(block)
+            continue
+        if not words:
+            scored.append(block.model_copy(update={"score": 0.0}))
+            continue
+        centrality = sum(frequencies[word] for word in words) / (len(words) ** 0.5 * len(blocks))
+        topical = sum(1 for word in words if word in topic_words) / len(words)
+        lead = 1.0 / (1 + position)
+        score = round(centrality + topical + 0.2 * lead, 4)
+        scored.append(block.model_copy(update={"score": score}))
+    return scored
+
+
+def build_chunk_manifest(
+    blocks: list[ContentBlock],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    excerpts: int = CHUNK_EXCERPTS,
+) -> ChunkManifest:
+    chunks: list[ChunkInfo] = []
+    current: list[int] = []
+    current_tokens = 0
+    token_counts = [estimate_tokens(block.text) for block in blocks]
+
+    def flush() -> None:
+        if not current:
+            return
+        ranked = sorted(current, key=lambda idx: blocks[idx].score or 0.0, reverse=True)
+        chunks.append(
+            ChunkInfo(
+                index=len(chunks) + 1,
+                start_block=current[0],
+                end_block=current[-1],
+                tokens=sum(token_counts[idx] for idx in current),
+                text="\n\n".join(blocks[idx].text for idx in current),
+                excerpts=[blocks[idx].text for idx in sorted(ranked[:excerpts])],
+            )
+        )
+
+    for idx, tokens in enumerate(token_counts):
+        if current and current_tokens + tokens > max_tokens:
+            flush()
+            current, current_tokens = [], 0
+        current.append(idx)
+        current_tokens += tokens
+    flush()
+
+    return ChunkManifest(
+        total_tokens=sum(token_counts),
+        max_chunk_tokens=max_tokens,
+        chunks=chunks,
+    )
+
+
+def build_digest(blocks: list[ContentBlock], budget: int) -> tuple[str, int]:
+    ranked = sorted(range(len(blocks)), key=lambda idx: blocks[idx].score or 0.0, reverse=True)
+    selected: dict[int, str] = {}
+    used = 0
+    for idx in ranked:
+        text = blocks[idx].text
+        tokens = estimate_tokens(text)
+        if used + tokens > budget:
+            remaining = budget - used
+            if remaining < CHUNK_MIN_EXCERPT_TOKENS:
+                continue
+            text = _truncate(text, remaining)
+            tokens = estimate_tokens(text)
+            if used + tokens > budget:
+                continue
+        selected[idx] = text
+        used += tokens
+    return "\n\n".join(selected[idx] for idx in sorted(selected)), used
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    # Shrink by the observed chars-per-token ratio, then cut at a word boundary.
+    limit = max(1, int(len(text) * (max_tokens - 1) / max(estimate_tokens(text), 1)))
+    cut = text[:limit]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip() + "…"
+
+
+def _content_words(text: str) -> list[str]:
+    return [
+        word
+        for word in _WORD_RE.findall(text.lower())
+        if len(word) > 1 and word not in _STOPWORDS
+    ]
@@ -1,5 +1,7 @@
 """Default configuration values."""
 
+from pathlib import Path
+
 DEFAULT_LANGUAGE = "en"
 SUMMARY_MIN_WORDS = 1
 SUMMARY_MAX_WORDS = 100
@@ -8,3 +10,37 @@ KEYWORDS_MAX = 10
 MAX_IMAGES = 8
 MAX_VIDEOS = 2
 MEDIA_TIMEOUT_SECONDS = 12
+FETCH_TIMEOUT_SECONDS = 20
+FETCH_MAX_BYTES = 8 * 1024 * 1024
+FETCH_CHUNK_BYTES = 64 * 1024
+FETCH_SNIFF_BYTES = 1024
+DEFAULT_ENCODING = "utf-8"
+FETCH_HEDGE_AFTER_SECONDS = 0
+FETCH_BREAKER_FAILURES = 3
+FETCH_BREAKER_COOLDOWN_SECONDS = 600
+FETCH_STATS_ALPHA = 0.3
+FETCH_MAX_HOSTS = 5000
+CACHE_DIRNAME = ".cache"
+EXTRACT_CACHE_VERSION = 1
+EXTRACT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+BOILERPLATE_RATIO = 0.5
+BOILERPLATE_MIN_PAGES = 5
+BOILERPLATE_MAX_BLOCKS = 4000
+BOILERPLATE_MAX_PAGES = 1000
+BOILERPLATE_MAX_DOMAINS = 1000
+CHUNK_MAX_TOKENS = 1000
+CHUNK_EXCERPTS = 2
+CHUNK_MIN_EXCERPT_TOKENS = 20
+TRANSLATE_BACKEND = "none"
+TRANSLATE_BATCH_CHARS = 4000
+TRANSLATE_BATCH_BLOCKS = 50
+TRANSLATE_WORKERS = 4
+TRANSLATE_TIMEOUT_SECONDS = 60
+TRANSLATE_CACHE_VERSION = 2
+TRANSLATE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+MDCN2EN_SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "mdcn2en" / "scripts"
+TRANSLATE_GLOSSARY_PATH = Path(__file__).resolve().parents[2] / "mdcn2en" / "references" / "glossary.jsonl"
+EXTRACT_PROFILES_PATH = Path(__file__).resolve().parents[1] / "assets" / "extract_profiles.json"
+EXTRACT_PROFILE_MIN_CHARS = 200
+BUNDLE_DIRNAME = "bundles"
+BUNDLE_SEGMENT_MAX_BYTES = 1024 * 1024 * 1024
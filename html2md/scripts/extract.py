@@ -2,25 +2,59 @@
 
 from __future__ import annotations
 
+import copy
+import re
 from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 import trafilatura
 from trafilatura import metadata
 from readability import Document
 
-from models import ContentBlock, ExtractedContent, MediaItem
+from config import EXTRACT_PROFILE_MIN_CHARS
+from extract_profiles import ProfileRegistry
+from models import ContentBlock, ExtractedContent, ExtractProfile, MediaItem
 
+_BLOCK_TAGS = (
+    "p", "div", "section", "article", "h1", "h2", "h3", "h4", "h5", "h6",
+    "li", "blockquote", "pre", "tr", "td", "th", "figcaption", "br",
+)
+_DROP_TAGS = ("script", "style", "noscript", "template")
+_DATE_RE = re.compile(r"(\d{4})\s*[-/.\u5e74]\s*(\d{1,2})\s*[-/.\u6708]\s*(\d{1,2})")
+
+
+def extract_content(
+    html: str | bytes,
+    canonical_url: str,
+    encoding: str | None = None,
+    profiles: ProfileRegistry | None = None,
+) -> ExtractedContent:
+    # One parse serves both the profile and the generic path, so a profile
+    # miss costs no more than having no profile.
+    try:
+        tree = _parse_tree(html, encoding)
+    except Exception:
+        tree = None
+
+    profile = profiles.match(canonical_url) if profiles else None
+    if profile:
+        extracted = _extract_with_profile(tree, canonical_url, profile) if tree is not None else None
+        profiles.record(profile, hit=extracted is not None)
+        if extracted is not None:
+            return extracted
 
-def extract_content(html: str, canonical_url: str) -> ExtractedContent:
     title = "Untitled"
     author = None
     publish_date = None
     extracted_text = None
 
     try:
-        extracted_text = trafilatura.extract(html)
-        meta = metadata.extract_metadata(html)
+        if tree is None:
+            raise ValueError("Unparseable HTML")
+        extracted_text = trafilatura.extract(tree)
+        meta = metadata.extract_metadata(tree)
         if meta:
             if meta.title:
                 title = meta.title
@@ -30,11 +64,14 @@ def extract_content(html: str, canonical_url: str) -> ExtractedContent:
         extracted_text = None
 
     if not extracted_text:
-        doc = Document(html)
+        doc = Document(_decode(html, encoding))
         title = doc.short_title() or title
         extracted_text = BeautifulSoup(doc.summary(), "lxml").get_text("\n")
 
-    soup = BeautifulSoup(html, "lxml")
+    if isinstance(html, bytes):
+        soup = BeautifulSoup(html, "lxml", from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(html, "lxml")
     if title == "Untitled":
         page_title = soup.find("title")
         if page_title and page_title.get_text(strip=True):
@@ -77,3 +114,116 @@ def extract_content(html: str, canonical_url: str) -> ExtractedContent:
         videos=videos,
         links=links,
     )
+
+
+def _extract_with_profile(
+    tree,
+    canonical_url: str,
+    profile: ExtractProfile,
+) -> ExtractedContent | None:
+    # Cheap selector path for known domains; None sends the page to the generic extractors.
+    # The tree is shared with the generic path, so it is only read, never modified.
+    try:
+        if isinstance(tree, str):
+            tree = lxml_html.fromstring(tree)
+        content = _first_node(tree, profile.content)
+        if content is None:
+            return None
+        text_blocks = [ContentBlock(text=block) for block in _node_blocks(content)]
+        min_chars = EXTRACT_PROFILE_MIN_CHARS if profile.min_chars is None else profile.min_chars
+        if sum(len(block.text) for block in text_blocks) < min_chars:
+            return None
+        title = _first_text(tree, profile.title) or _first_text(tree, ["//title"]) or "Untitled"
+        publish_date = _normalize_date(_first_text(tree, profile.date))
+        images = [
+            MediaItem(type="image", url=urljoin(canonical_url, src))
+            for src in _unique_values(content, profile.images)
+            if not src.startswith("data:")
+        ]
+        videos = [
+            MediaItem(type="video", url=urljoin(canonical_url, src))
+            for src in _unique_values(content, profile.videos)
+        ]
+        links = [urljoin(canonical_url, href) for href in tree.xpath("//a/@href")]
+    except (etree.XPathError, ValueError):
+        return None
+
+    return ExtractedContent(
+        title=title,
+        author=None,
+        publish_date=publish_date,
+        canonical_url=canonical_url,
+        text_blocks=text_blocks,
+        images=images,
+        videos=videos,
+        links=links,
+    )
+
+
+def _first_node(tree, xpaths: list[str]):
+    for xpath in xpaths:
+        for node in tree.xpath(xpath):
+            if isinstance(node, etree._Element):
+                return node
+    return None
+
+
+def _first_text(tree, xpaths: list[str]) -> str | None:
+    for xpath in xpaths:
+        for value in tree.xpath(xpath):
+            text = value.text_content() if isinstance(value, etree._Element) else str(value)
+            text = " ".join(text.split())
+            if text:
+                return text
+    return None
+
+
+def _unique_values(node, xpaths: list[str]) -> list[str]:
+    # The first xpath that yields values wins, e.g. lazy-load data-src over src.
+    for xpath in xpaths:
+        values = [str(value).strip() for value in node.xpath(xpath) if str(value).strip()]
+        if values:
+            return list(dict.fromkeys(values))
+    return []
+
+
+def _node_blocks(node) -> list[str]:
+    node = copy.deepcopy(node)
+    for dropped in node.xpath(".//*[" + " or ".join(f"self::{tag}" for tag in _DROP_TAGS) + "]"):
+        dropped.drop_tree()
+    for element in node.iter(*_BLOCK_TAGS):
+        element.tail = "\n" + (element.tail or "")
+        if element.tag != "br":
+            element.text = "\n" + (element.text or "")
+    return [line.strip() for line in node.text_content().split("\n") if line.strip()]
+
+
+def _normalize_date(value: str | None) -> str | None:
+    if not value:
+        return None
+    match = _DATE_RE.search(value)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def _parse_tree(html: str | bytes, encoding: str | None):
+    # Parse raw bytes once with the known encoding so trafilatura neither
+    # guesses the charset nor re-encodes a decoded string.
+    if isinstance(html, str):
+        return html
+    parser = lxml_html.HTMLParser(
+        encoding=encoding,
+        collect_ids=False,
+        default_doctype=False,
+        remove_comments=True,
+        remove_pis=True,
+    )
+    return lxml_html.fromstring(html, parser=parser)
+
+
+def _decode(html: str | bytes, encoding: str | None) -> str:
+    if isinstance(html, str):
+        return html
+    return html.decode(encoding or "utf-8", errors="replace")
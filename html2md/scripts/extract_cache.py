@@ -0,0 +1,80 @@
+"""On-disk cache of extraction results keyed by HTML content hash."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import zlib
+from importlib import metadata as importlib_metadata
+from pathlib import Path
+
+from cache_budget import CacheBudget
+from config import EXTRACT_CACHE_MAX_BYTES, EXTRACT_CACHE_VERSION
+from models import ExtractedContent
+
+_SUFFIX = ".json.z"
+
+
+class ExtractionCache:
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        max_bytes: int = EXTRACT_CACHE_MAX_BYTES,
+        salt: str = "",
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.budget = CacheBudget(self.cache_dir, max_bytes, _SUFFIX)
+        self.hits = 0
+        self.misses = 0
+        # The salt covers extractor inputs beyond package versions, e.g. profiles.
+        self._fingerprint = _extractor_fingerprint() + (f";salt={salt}" if salt else "")
+
+    def key(self, content: str | bytes, canonical_url: str, encoding: str | None = None) -> str:
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        digest = hashlib.sha256()
+        # The same bytes decode differently under a corrected charset.
+        for part in (self._fingerprint, canonical_url, encoding or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(content)
+        return digest.hexdigest()
+
+    def get(self, content: str | bytes, canonical_url: str, encoding: str | None = None) -> ExtractedContent | None:
+        path = self._path(self.key(content, canonical_url, encoding))
+        try:
+            payload = zlib.decompress(path.read_bytes())
+            extracted = ExtractedContent.model_validate_json(payload)
+        except (OSError, zlib.error, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return extracted
+
+    def put(
+        self,
+        content: str | bytes,
+        canonical_url: str,
+        extracted: ExtractedContent,
+        encoding: str | None = None,
+    ) -> None:
+        path = self._path(self.key(content, canonical_url, encoding))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(zlib.compress(extracted.model_dump_json().encode("utf-8"), 6))
+        self.budget.replace(tmp_path, path)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{_SUFFIX}"
+
+
+def _extractor_fingerprint() -> str:
+    versions = [f"cache={EXTRACT_CACHE_VERSION}"]
+    for package in ("trafilatura", "readability-lxml", "beautifulsoup4", "lxml"):
+        try:
+            versions.append(f"{package}={importlib_metadata.version(package)}")
+        except importlib_metadata.PackageNotFoundError:
+            versions.append(f"{package}=missing")
+    return ";".join(versions)
@@ -0,0 +1,96 @@
+"""Per-domain extraction profiles with hit-rate statistics."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from config import EXTRACT_PROFILES_PATH
+from models import ExtractProfile, ProfileStats
+from utils import file_lock, source_domain
+
+
+class ProfileRegistry:
+    def __init__(
+        self,
+        profiles: list[ExtractProfile] | None = None,
+        stats: dict[str, ProfileStats] | None = None,
+    ) -> None:
+        self.profiles = {profile.domain: profile for profile in profiles or []}
+        self.stats: dict[str, ProfileStats] = stats or {}
+        # Counts recorded since load or the last save; save merges them into
+        # the file so concurrent runs do not overwrite each other's counts.
+        self._pending: dict[str, ProfileStats] = {}
+        self.fingerprint = hashlib.sha256(
+            json.dumps([p.model_dump() for p in self.profiles.values()], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path = EXTRACT_PROFILES_PATH,
+        stats_path: str | Path | None = None,
+    ) -> "ProfileRegistry":
+        profiles_path = Path(path)
+        profiles: list[ExtractProfile] = []
+        if profiles_path.exists():
+            raw = json.loads(profiles_path.read_text(encoding="utf-8"))
+            profiles = [ExtractProfile.model_validate(item) for item in raw]
+        return cls(profiles, _read_stats(stats_path) if stats_path else {})
+
+    def match(self, canonical_url: str) -> ExtractProfile | None:
+        # Exact host first, then parent domains: a.b.example.com -> b.example.com -> example.com.
+        labels = source_domain(canonical_url).split(".")
+        for start in range(len(labels) - 1):
+            profile = self.profiles.get(".".join(labels[start:]))
+            if profile:
+                return profile
+        return None
+
+    def record(self, profile: ExtractProfile, hit: bool) -> None:
+        with self._lock:
+            for counts in (self.stats, self._pending):
+                stats = counts.setdefault(profile.domain, ProfileStats())
+                if hit:
+                    stats.hits += 1
+                else:
+                    stats.misses += 1
+
+    def hit_rates(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                domain: round(stats.hits / (stats.hits + stats.misses), 4)
+                for domain, stats in self.stats.items()
+                if stats.hits + stats.misses
+            }
+
+    def save(self, path: str | Path) -> None:
+        stats_path = Path(path)
+        stats_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, file_lock(stats_path.with_name(stats_path.name + ".lock")):
+            merged = _read_stats(stats_path)
+            for domain, delta in self._pending.items():
+                stats = merged.setdefault(domain, ProfileStats())
+                stats.hits += delta.hits
+                stats.misses += delta.misses
+            payload = {domain: stats.model_dump() for domain, stats in merged.items()}
+            tmp_path = stats_path.with_name(stats_path.name + ".tmp")
+            tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            tmp_path.replace(stats_path)
+            self.stats = merged
+            self._pending = {}
+
+
+def _read_stats(path: str | Path) -> dict[str, ProfileStats]:
+    stats_path = Path(path)
+    if not stats_path.exists():
+        return {}
+    try:
+        raw = json.loads(stats_path.read_text(encoding="utf-8"))
+        return {domain: ProfileStats.model_validate(data) for domain, data in raw.items()}
+    except (ValueError, TypeError):
+        return {}
+
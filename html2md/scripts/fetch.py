@@ -2,37 +2,155 @@
 
 from __future__ import annotations
 
+import codecs
+import re
+
 import requests
-from bs4 import BeautifulSoup
-
-
-def fetch_html(url: str, timeout: int = 20, use_headless: bool = False) -> tuple[str, str]:
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/122.0.0.0 Safari/537.36"
-        ),
-        "Accept-Language": "en-US,en;q=0.9",
-    }
-    response = requests.get(url, timeout=timeout, headers=headers)
-    if response.status_code in {401, 403}:
-        if use_headless:
-            try:
-                html, canonical_url = headless_fetch(url, timeout=timeout)
-                return html, canonical_url
-            except Exception:
-                pass
-        proxy_url = _jina_proxy(url)
-        response = requests.get(proxy_url, timeout=timeout, headers=headers)
-    response.raise_for_status()
-    html = response.text
-    canonical_url = url
-    soup = BeautifulSoup(html, "lxml")
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config import (
+    DEFAULT_ENCODING,
+    FETCH_CHUNK_BYTES,
+    FETCH_MAX_BYTES,
+    FETCH_SNIFF_BYTES,
+    FETCH_TIMEOUT_SECONDS,
+)
+from fetch_strategy import FetchStrategy, PathFailure
+from models import FetchedPage
+
+_META_CHARSET_RE = re.compile(
+    rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_:.-]+)""",
+    re.IGNORECASE,
+)
+_BOMS = [
+    (b"\xef\xbb\xbf", "utf-8"),
+    (b"\xff\xfe", "utf-16-le"),
+    (b"\xfe\xff", "utf-16-be"),
+]
+
+
+_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def fetch_html(
+    url: str,
+    timeout: int = FETCH_TIMEOUT_SECONDS,
+    use_headless: bool = False,
+    max_bytes: int = FETCH_MAX_BYTES,
+    strategy: FetchStrategy | None = None,
+    proxy_on_network_error: bool = False,
+) -> FetchedPage:
+    # Only 401/403 falls through to headless and the third-party Jina proxy;
+    # connection errors and timeouts do so only with proxy_on_network_error.
+    paths = [("direct", lambda: _fetch_direct(url, url, timeout, max_bytes, proxy_on_network_error))]
+    if use_headless:
+        paths.append(("headless", lambda: _fetch_headless(url, timeout)))
+    paths.append(("proxy", lambda: _fetch_direct(_jina_proxy(url), url, timeout, max_bytes, True)))
+    return (strategy or FetchStrategy()).fetch(url, paths)
+
+
+def _fetch_direct(
+    request_url: str,
+    url: str,
+    timeout: int,
+    max_bytes: int,
+    fall_through_on_network_error: bool,
+) -> FetchedPage:
+    network_errors = (requests.ConnectionError, requests.Timeout) if fall_through_on_network_error else ()
+    try:
+        response = requests.get(request_url, timeout=timeout, headers=_HEADERS, stream=True)
+    except network_errors as exc:
+        raise PathFailure(str(exc)) from exc
+    with response:
+        if response.status_code in {401, 403}:
+            raise PathFailure(f"Blocked with HTTP {response.status_code}: {request_url}")
+        response.raise_for_status()
+        try:
+            content, truncated = _read_capped(response, max_bytes)
+        except network_errors as exc:
+            raise PathFailure(str(exc)) from exc
+        declared = _header_charset(response.headers.get("Content-Type", ""))
+    encoding = declared or _sniff_encoding(content)
+    return FetchedPage(
+        content=content,
+        encoding=encoding,
+        url=url,
+        canonical_url=_canonical_url(content, encoding, url),
+        truncated=truncated,
+    )
+
+
+def _fetch_headless(url: str, timeout: int) -> FetchedPage:
+    try:
+        html, canonical_url = headless_fetch(url, timeout=timeout)
+    except Exception as exc:
+        raise PathFailure(str(exc)) from exc
+    return FetchedPage(
+        content=html.encode("utf-8"),
+        encoding="utf-8",
+        url=url,
+        canonical_url=canonical_url,
+    )
+
+
+def _read_capped(response: requests.Response, max_bytes: int) -> tuple[bytes, bool]:
+    chunks: list[bytes] = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=FETCH_CHUNK_BYTES):
+        if not chunk:
+            continue
+        if max_bytes > 0 and size + len(chunk) > max_bytes:
+            chunks.append(chunk[: max_bytes - size])
+            return b"".join(chunks), True
+        chunks.append(chunk)
+        size += len(chunk)
+    return b"".join(chunks), False
+
+
+def _header_charset(content_type: str) -> str | None:
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "charset" and value.strip():
+            return _normalize_encoding(value.strip().strip("\"'"))
+    return None
+
+
+def _sniff_encoding(content: bytes) -> str:
+    for bom, encoding in _BOMS:
+        if content.startswith(bom):
+            return encoding
+    match = _META_CHARSET_RE.search(content[:FETCH_SNIFF_BYTES])
+    if match:
+        encoding = _normalize_encoding(match.group(1).decode("ascii", "ignore"))
+        if encoding:
+            return encoding
+    return DEFAULT_ENCODING
+
+
+def _normalize_encoding(name: str) -> str | None:
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def _canonical_url(content: bytes | str, encoding: str | None, url: str) -> str:
+    strainer = SoupStrainer("link", rel="canonical")
+    if isinstance(content, bytes):
+        soup = BeautifulSoup(content, "lxml", from_encoding=encoding, parse_only=strainer)
+    else:
+        soup = BeautifulSoup(content, "lxml", parse_only=strainer)
     canonical = soup.find("link", rel="canonical")
     if canonical and canonical.get("href"):
-        canonical_url = canonical["href"].strip()
-    return html, canonical_url
+        return canonical["href"].strip()
+    return url
 
 
 def _jina_proxy(url: str) -> str:
@@ -66,12 +184,7 @@ def headless_fetch(url: str, timeout: int = 30) -> tuple[str, str]:
         html = page.content()
         browser.close()
 
-    canonical_url = url
-    soup = BeautifulSoup(html, "lxml")
-    canonical = soup.find("link", rel="canonical")
-    if canonical and canonical.get("href"):
-        canonical_url = canonical["href"].strip()
-    return html, canonical_url
+    return html, _canonical_url(html, None, url)
 
 
 def _accept_consent(page) -> None:
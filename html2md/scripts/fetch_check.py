@@ -0,0 +1,146 @@
+"""Check FetchStrategy hedging, path memory and circuit breakers against local stub servers."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+
+import requests
+
+from fetch_strategy import FetchPath, FetchStrategy, PathFailure
+from models import FetchedPage
+
+_PAGE = b"<html><head><title>stub</title></head><body><p>ok</p></body></html>"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # /ok answers at once, /slow after slow_seconds, /forbidden with 403.
+    hits: dict[str, int] = {}
+    slow_seconds = 1.0
+
+    def do_GET(self) -> None:
+        self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        if self.path == "/forbidden":
+            self.send_response(403)
+            self.end_headers()
+            return
+        if self.path == "/slow":
+            time.sleep(self.slow_seconds)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(_PAGE)))
+        self.end_headers()
+        self.wfile.write(_PAGE)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def _stub_path(base: str, name: str, route: str) -> FetchPath:
+    def fetch() -> FetchedPage:
+        try:
+            response = requests.get(base + route, timeout=5)
+        except requests.RequestException as exc:
+            raise PathFailure(str(exc)) from exc
+        if response.status_code in {401, 403}:
+            raise PathFailure(f"Blocked with HTTP {response.status_code}: {route}")
+        return FetchedPage(content=response.content, encoding="utf-8", url=base, canonical_url=base + route)
+
+    return name, fetch
+
+
+def check_hedging(base: str, slow_seconds: float) -> dict:
+    strategy = FetchStrategy(hedge_after=0.1)
+    paths = [_stub_path(base, "direct", "/slow"), _stub_path(base, "proxy", "/ok")]
+    started = time.monotonic()
+    page = strategy.fetch(base, paths)
+    elapsed = time.monotonic() - started
+    snapshot = strategy.hosts["127.0.0.1"].model_dump()
+    # The slow loser finishes after fetch returned and must not touch the stats.
+    time.sleep(slow_seconds + 0.2)
+    after = strategy.hosts["127.0.0.1"].model_dump()
+    _expect(page.canonical_url.endswith("/ok"), "the hedged fetch did not return the fast path")
+    _expect(elapsed < slow_seconds / 2, f"hedged fetch took {elapsed:.2f}s")
+    _expect(snapshot == after, "stats changed after the hedged fetch returned")
+    _expect("direct" not in after["paths"], "the losing path was recorded")
+    return {"seconds": round(elapsed, 3), "preferred": after["preferred"]}
+
+
+def check_preferred_path(base: str) -> dict:
+    strategy = FetchStrategy()
+    paths = [_stub_path(base, "direct", "/forbidden"), _stub_path(base, "proxy", "/ok")]
+    before = _StubHandler.hits.get("/forbidden", 0)
+    strategy.fetch(base, paths)
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path = Path(tmp) / "fetch-hosts.json"
+        strategy.save(state_path)
+        strategy = FetchStrategy.load(state_path)
+    strategy.fetch(base, paths)
+    blocked = _StubHandler.hits.get("/forbidden", 0) - before
+    _expect(strategy.hosts["127.0.0.1"].preferred == "proxy", "the working path was not remembered")
+    _expect(blocked == 1, f"the blocked path was tried {blocked} times instead of once")
+    return {"blocked_attempts": blocked, "preferred": "proxy"}
+
+
+def check_breaker(base: str) -> dict:
+    strategy = FetchStrategy(breaker_failures=2, breaker_cooldown=0.3)
+    paths = [_stub_path(base, "direct", "/forbidden")]
+    for _ in range(2):
+        _expect_raises(PathFailure, lambda: strategy.fetch(base, paths), "a blocked fetch did not fail")
+    before = _StubHandler.hits.get("/forbidden", 0)
+    _expect_raises(RuntimeError, lambda: strategy.fetch(base, paths), "the open breaker did not short-circuit")
+    _expect(_StubHandler.hits.get("/forbidden", 0) == before, "an open breaker still sent a request")
+    time.sleep(0.4)
+    _expect_raises(PathFailure, lambda: strategy.fetch(base, paths), "the breaker did not half-open")
+    _expect(_StubHandler.hits.get("/forbidden", 0) == before + 1, "no request after the cooldown")
+    return {"failures_to_open": 2, "cooldown_seconds": 0.3}
+
+
+def _expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise AssertionError(message)
+
+
+def _expect_raises(error: type[Exception], call: Callable[[], object], message: str) -> None:
+    try:
+        call()
+    except error:
+        return
+    raise AssertionError(message)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check fetch hedging and circuit breakers against stub servers.")
+    parser.add_argument("--slow-seconds", type=float, default=1.0, help="Delay of the slow stub path")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    _StubHandler.slow_seconds = args.slow_seconds
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        report = {
+            "hedging": check_hedging(base, args.slow_seconds),
+            "preferred_path": check_preferred_path(base),
+            "breaker": check_breaker(base),
+        }
+    except AssertionError as exc:
+        raise SystemExit(f"FAILED: {exc}") from None
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
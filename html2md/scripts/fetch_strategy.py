@@ -0,0 +1,180 @@
+"""Per-host fetch path selection with hedging and circuit breakers."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlparse
+
+from config import (
+    FETCH_BREAKER_COOLDOWN_SECONDS,
+    FETCH_BREAKER_FAILURES,
+    FETCH_MAX_HOSTS,
+    FETCH_STATS_ALPHA,
+)
+from models import FetchedPage, HostStats, PathStats
+
+FetchPath = tuple[str, Callable[[], FetchedPage]]
+
+
+class PathFailure(RuntimeError):
+    """A fetch path failed in a way that should fall through to the next path."""
+
+
+class FetchStrategy:
+    def __init__(
+        self,
+        hedge_after: float | None = None,
+        breaker_failures: int = FETCH_BREAKER_FAILURES,
+        breaker_cooldown: float = FETCH_BREAKER_COOLDOWN_SECONDS,
+        max_hosts: int = FETCH_MAX_HOSTS,
+        hosts: dict[str, HostStats] | None = None,
+    ) -> None:
+        self.hedge_after = hedge_after
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.max_hosts = max_hosts
+        self.hosts: dict[str, HostStats] = hosts or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str | Path, **kwargs) -> "FetchStrategy":
+        state_path = Path(path)
+        hosts: dict[str, HostStats] = {}
+        if state_path.exists():
+            try:
+                raw = json.loads(state_path.read_text(encoding="utf-8"))
+                hosts = {host: HostStats.model_validate(data) for host, data in raw.items()}
+            except (ValueError, TypeError):
+                hosts = {}
+        return cls(hosts=hosts, **kwargs)
+
+    def save(self, path: str | Path) -> None:
+        state_path = Path(path)
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = {host: stats.model_dump() for host, stats in self.hosts.items()}
+        tmp_path = state_path.with_suffix(state_path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        tmp_path.replace(state_path)
+
+    def fetch(self, url: str, paths: list[FetchPath]) -> FetchedPage:
+        host = urlparse(url).hostname or ""
+        queue = self._order(host, paths)
+        if not queue:
+            raise RuntimeError(f"All fetch paths are circuit-open for host: {host}")
+
+        executor = ThreadPoolExecutor(max_workers=len(queue))
+        pending: dict = {}
+        last_error: Exception | None = None
+        # Hedged losers keep running after fetch returns; once this is set they
+        # no longer record, so stats cannot change after the caller saves them.
+        settled = threading.Event()
+
+        def launch() -> None:
+            name, func = queue.pop(0)
+            pending[executor.submit(self._run, host, name, func, settled)] = name
+
+        try:
+            launch()
+            while pending:
+                hedge = self.hedge_after if self.hedge_after and queue else None
+                done, _ = wait(pending, timeout=hedge, return_when=FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for future in done:
+                    pending.pop(future)
+                    try:
+                        return future.result()
+                    except PathFailure as exc:
+                        last_error = exc.__cause__ or exc
+                if queue:
+                    launch()
+        finally:
+            with self._lock:
+                settled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise last_error or RuntimeError(f"Fetch failed for host: {host}")
+
+    def _run(
+        self,
+        host: str,
+        name: str,
+        func: Callable[[], FetchedPage],
+        settled: threading.Event | None = None,
+    ) -> FetchedPage:
+        started = time.monotonic()
+        try:
+            page = func()
+        except PathFailure:
+            self._record(host, name, time.monotonic() - started, ok=False, settled=settled)
+            raise
+        self._record(host, name, time.monotonic() - started, ok=True, settled=settled)
+        return page
+
+    def _order(self, host: str, paths: list[FetchPath]) -> list[FetchPath]:
+        now = time.time()
+        with self._lock:
+            stats = self.hosts.get(host)
+            if stats is None:
+                return list(paths)
+            available = [
+                (position, path)
+                for position, path in enumerate(paths)
+                if stats.paths.get(path[0], PathStats()).open_until <= now
+            ]
+
+            def rank(item: tuple[int, FetchPath]) -> tuple[bool, bool, int]:
+                position, (name, _) = item
+                path_stats = stats.paths.get(name, PathStats())
+                return (name != stats.preferred, path_stats.error_rate >= 0.5, position)
+
+            return [path for _, path in sorted(available, key=rank)]
+
+    def _record(
+        self,
+        host: str,
+        name: str,
+        latency: float,
+        ok: bool,
+        settled: threading.Event | None = None,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            if settled is not None and settled.is_set():
+                return
+            stats = self.hosts.setdefault(host, HostStats())
+            path_stats = stats.paths.setdefault(name, PathStats())
+            alpha = FETCH_STATS_ALPHA
+            path_stats.error_rate = (1 - alpha) * path_stats.error_rate + alpha * (0.0 if ok else 1.0)
+            if ok:
+                path_stats.successes += 1
+                path_stats.consecutive_failures = 0
+                path_stats.open_until = 0.0
+                if path_stats.latency is None:
+                    path_stats.latency = latency
+                else:
+                    path_stats.latency = (1 - alpha) * path_stats.latency + alpha * latency
+                stats.preferred = name
+            else:
+                path_stats.failures += 1
+                path_stats.consecutive_failures += 1
+                if path_stats.consecutive_failures >= self.breaker_failures:
+                    path_stats.open_until = now + self.breaker_cooldown
+                if stats.preferred == name:
+                    stats.preferred = None
+            stats.updated_at = now
+            self._evict()
+
+    def _evict(self) -> None:
+        overflow = len(self.hosts) - self.max_hosts
+        if overflow <= 0:
+            return
+        stale = sorted(self.hosts, key=lambda host: self.hosts[host].updated_at)[:overflow]
+        for host in stale:
+            del self.hosts[host]
@@ -18,6 +18,44 @@ class MediaItem(BaseModel):
     snapshot_path: str | None = None
 
 
+class ExtractProfile(BaseModel):
+    domain: str
+    content: list[str]
+    title: list[str] = []
+    date: list[str] = []
+    images: list[str] = [".//img/@data-src", ".//img/@src"]
+    videos: list[str] = [".//video/@src", ".//video/source/@src"]
+    min_chars: int | None = None
+
+
+class ProfileStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+
+
+class FetchedPage(BaseModel):
+    content: bytes
+    encoding: str
+    url: str
+    canonical_url: str
+    truncated: bool = False
+
+
+class PathStats(BaseModel):
+    latency: float | None = None
+    error_rate: float = 0.0
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+
+
+class HostStats(BaseModel):
+    preferred: str | None = None
+    paths: dict[str, PathStats] = {}
+    updated_at: float = 0.0
+
+
 class ExtractedContent(BaseModel):
     title: str
     author: str | None = None
@@ -44,7 +82,46 @@ class RenderInput(BaseModel):
     videos: list[MediaItem]
 
 
+class ChunkInfo(BaseModel):
+    index: int
+    start_block: int
+    end_block: int
+    tokens: int
+    text: str
+    excerpts: list[str]
+
+
+class ChunkManifest(BaseModel):
+    markdown_path: str = ""
+    total_tokens: int
+    max_chunk_tokens: int
+    chunks: list[ChunkInfo]
+    summary_budget: int | None = None
+    digest: str | None = None
+    digest_tokens: int | None = None
+
+
+class StageTiming(BaseModel):
+    name: str
+    track: Literal["main", "media"]
+    start: float
+    end: float
+    seconds: float
+    overlap_seconds: float = 0.0
+
+
+class PipelineTimings(BaseModel):
+    total_seconds: float
+    stages: list[StageTiming]
+    overlap_seconds: float = 0.0
+    media_wait_seconds: float = 0.0
+
+
 class SkillResult(BaseModel):
     markdown_path: str
     assets_dir: str
     metadata_path: str | None = None
+    chunks_path: str | None = None
+    bundle_path: str | None = None
+    timings: PipelineTimings | None = None
+    translation_failed: int = 0
@@ -4,18 +4,42 @@ from __future__ import annotations
 
 import argparse
 import json
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 from urllib.parse import urlparse
 
-from config import DEFAULT_LANGUAGE, MAX_IMAGES, MAX_VIDEOS, MEDIA_TIMEOUT_SECONDS
+from boilerplate import BoilerplateIndex
+from bundle import Bundle
+from chunking import build_chunk_manifest, build_digest, score_blocks
+from config import (
+    BUNDLE_DIRNAME,
+    CACHE_DIRNAME,
+    DEFAULT_LANGUAGE,
+    EXTRACT_PROFILES_PATH,
+    FETCH_HEDGE_AFTER_SECONDS,
+    FETCH_MAX_BYTES,
+    MAX_IMAGES,
+    MAX_VIDEOS,
+    MEDIA_TIMEOUT_SECONDS,
+    TRANSLATE_BACKEND,
+    TRANSLATE_GLOSSARY_PATH,
+    TRANSLATE_WORKERS,
+)
 from extract import extract_content
+from extract_cache import ExtractionCache
+from extract_profiles import ProfileRegistry
 from fetch import fetch_html
+from fetch_strategy import FetchStrategy
 from media import capture_video_snapshots, download_images
-from models import RenderInput, SkillResult
+from models import ChunkManifest, RenderInput, SkillResult
 from render import render_markdown
+from timing import WAIT_STAGE, StageTimer
 from topic_filter import filter_by_topic
-from translate import normalize_blocks
+from translate import BACKENDS, Translator, get_backend, normalize_blocks
 from utils import build_output_basename
 
 
@@ -28,83 +52,236 @@ def run_skill(
     max_videos: int = MAX_VIDEOS,
     skip_media: bool = False,
     use_headless: bool = False,
+    max_bytes: int = FETCH_MAX_BYTES,
+    hedge_after: float = FETCH_HEDGE_AFTER_SECONDS,
+    strategy: FetchStrategy | None = None,
+    proxy_on_network_error: bool = False,
+    use_extract_cache: bool = True,
+    strip_boilerplate: bool = True,
+    summary_budget: int | None = None,
+    translate_backend: str = TRANSLATE_BACKEND,
+    translate_url: str | None = None,
+    translate_workers: int = TRANSLATE_WORKERS,
+    glossary_path: str | Path | None = TRANSLATE_GLOSSARY_PATH,
+    profiles_path: str | Path | None = EXTRACT_PROFILES_PATH,
+    bundle: bool = False,
 ) -> SkillResult:
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
-    assets_dir = output_path / "media"
+    cache_dir = output_path / CACHE_DIRNAME
+
+    timer = StageTimer()
+    strategy_path = cache_dir / "fetch-hosts.json"
+    if strategy is None:
+        strategy = FetchStrategy.load(strategy_path, hedge_after=hedge_after or None)
+    with timer.stage("fetch"):
+        try:
+            page = fetch_html(
+                url,
+                use_headless=use_headless,
+                max_bytes=max_bytes,
+                strategy=strategy,
+                proxy_on_network_error=proxy_on_network_error,
+            )
+        finally:
+            strategy.save(strategy_path)
+    with timer.stage("extract"):
+        profiles_stats_path = cache_dir / "extract-profiles.json"
+        profiles = ProfileRegistry.load(profiles_path, profiles_stats_path) if profiles_path else None
+        extract_cache = (
+            ExtractionCache(cache_dir / "extract", salt=profiles.fingerprint if profiles else "")
+            if use_extract_cache
+            else None
+        )
+        extracted = extract_cache.get(page.content, page.canonical_url, page.encoding) if extract_cache else None
+        if extracted is None:
+            extracted = extract_content(
+                page.content,
+                page.canonical_url,
+                encoding=page.encoding,
+                profiles=profiles,
+            )
+            if extract_cache:
+                extract_cache.put(page.content, page.canonical_url, extracted, page.encoding)
+            if profiles:
+                profiles.save(profiles_stats_path)
+
+    if bundle:
+        # Media is staged per run and packed into the bundle with the document.
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        staging_dir = Path(tempfile.mkdtemp(prefix="bundle-", dir=cache_dir))
+        assets_dir = staging_dir / "media"
+    else:
+        staging_dir = None
+        assets_dir = output_path / "media"
     assets_dir.mkdir(parents=True, exist_ok=True)
 
-    html, canonical_url = fetch_html(url, use_headless=use_headless)
-    extracted = extract_content(html, canonical_url)
-
-    blocks = extracted.text_blocks
-    if topic_focus:
-        blocks = filter_by_topic(blocks, topic_focus)
-    blocks = normalize_blocks(blocks)
-
-    block_texts = [block.text for block in blocks]
-    content_text = "\n\n".join(block_texts)
-
-    if skip_media:
-        images = extracted.images
-        videos = extracted.videos
-    else:
-        images = download_images(
-            extracted.images,
-            str(assets_dir),
-            timeout=MEDIA_TIMEOUT_SECONDS,
-            max_items=max_images,
-        )
-        videos = capture_video_snapshots(
-            extracted.videos,
-            str(assets_dir),
-            max_items=max_videos,
+    try:
+        # Media URLs are known now; download them while the text stages run.
+        media_pool = None
+        if not skip_media:
+            media_pool = ThreadPoolExecutor(max_workers=2)
+            images_future = media_pool.submit(
+                timer.wrap("images", download_images),
+                extracted.images,
+                str(assets_dir),
+                timeout=MEDIA_TIMEOUT_SECONDS,
+                max_items=max_images,
+            )
+            videos_future = media_pool.submit(
+                timer.wrap("videos", capture_video_snapshots),
+                extracted.videos,
+                str(assets_dir),
+                max_items=max_videos,
+            )
+
+        try:
+            blocks = extracted.text_blocks
+            if strip_boilerplate:
+                with timer.stage("boilerplate"):
+                    boilerplate = BoilerplateIndex(cache_dir / "boilerplate")
+                    boilerplate.observe(extracted.canonical_url, blocks)
+                    blocks = boilerplate.strip(extracted.canonical_url, blocks)
+                    boilerplate.save()
+            if topic_focus:
+                with timer.stage("topic_filter"):
+                    blocks = filter_by_topic(blocks, topic_focus)
+            with timer.stage("normalize"):
+                translator = Translator(
+                    get_backend(translate_backend, url=translate_url),
+                    target_lang=language,
+                    cache_dir=cache_dir / "translate",
+                    workers=translate_workers,
+                    glossary_path=glossary_path,
+                )
+                blocks = normalize_blocks(blocks, translator)
+
+            block_texts = [block.text for block in blocks]
+
+            if media_pool is None:
+                images = extracted.images
+                videos = extracted.videos
+            else:
+                with timer.stage(WAIT_STAGE):
+                    images = images_future.result()
+                    videos = videos_future.result()
+        finally:
+            if media_pool is not None:
+                media_pool.shutdown(wait=True)
+
+        sources = {
+            "url": extracted.canonical_url,
+            "publish_date": extracted.publish_date or "",
+            "generated_date": datetime.now(timezone.utc).date().isoformat(),
+        }
+
+        with timer.stage("render"):
+            content_markdown = _build_content_markdown(
+                block_texts,
+                images,
+                videos,
+                extracted.links,
+            )
+
+            render_input = RenderInput(
+                title=extracted.title,
+                summary="",
+                keywords=[],
+                sources=sources,
+                content_markdown=content_markdown,
+                images=images,
+                videos=videos,
+            )
+            markdown = render_markdown(render_input)
+
+        with timer.stage("chunks"):
+            scored_blocks = score_blocks(blocks, topic_focus)
+            manifest = build_chunk_manifest(scored_blocks)
+            if summary_budget:
+                digest, digest_tokens = build_digest(scored_blocks, summary_budget)
+                manifest.summary_budget = summary_budget
+                manifest.digest = digest
+                manifest.digest_tokens = digest_tokens
+
+        with timer.stage("write"):
+            base_name = build_output_basename(
+                title=extracted.title,
+                source_url=extracted.canonical_url,
+                publish_date=extracted.publish_date,
+                generated_date=sources["generated_date"],
+            )
+            metadata_json = json.dumps(extracted.model_dump(), ensure_ascii=False, indent=2)
+            if bundle:
+                base_name, segment_path = _write_bundle(
+                    output_path / BUNDLE_DIRNAME,
+                    extracted.canonical_url,
+                    base_name,
+                    markdown,
+                    metadata_json,
+                    manifest,
+                    assets_dir,
+                )
+            else:
+                markdown_path = _unique_path(output_path, base_name, ".md")
+                markdown_path.write_text(markdown, encoding="utf-8")
+
+                metadata_path = _unique_path(output_path, base_name, ".json")
+                metadata_path.write_text(metadata_json, encoding="utf-8")
+
+                manifest.markdown_path = str(markdown_path)
+                chunks_path = markdown_path.with_suffix(".chunks.json")
+                chunks_path.write_text(
+                    json.dumps(manifest.model_dump(), ensure_ascii=False, indent=2),
+                    encoding="utf-8",
+                )
+
+        if bundle:
+            # Paths are member names inside the bundle; `bundle.py export` restores the files.
+            return SkillResult(
+                markdown_path=f"{base_name}.md",
+                assets_dir=assets_dir.name,
+                metadata_path=f"{base_name}.json",
+                chunks_path=f"{base_name}.chunks.json",
+                bundle_path=segment_path,
+                timings=timer.report(),
+                translation_failed=translator.stats["failed"],
+            )
+        return SkillResult(
+            markdown_path=str(markdown_path),
+            assets_dir=str(assets_dir),
+            metadata_path=str(metadata_path),
+            chunks_path=str(chunks_path),
+            timings=timer.report(),
+            translation_failed=translator.stats["failed"],
         )
+    finally:
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir, ignore_errors=True)
 
-    sources = {
-        "url": extracted.canonical_url,
-        "publish_date": extracted.publish_date or "",
-        "generated_date": datetime.now(timezone.utc).date().isoformat(),
-    }
-
-    content_markdown = _build_content_markdown(
-        block_texts,
-        images,
-        videos,
-        extracted.links,
-    )
-
-    render_input = RenderInput(
-        title=extracted.title,
-        summary="",
-        keywords=[],
-        sources=sources,
-        content_markdown=content_markdown,
-        images=images,
-        videos=videos,
-    )
-    markdown = render_markdown(render_input)
-
-    base_name = build_output_basename(
-        title=extracted.title,
-        source_url=extracted.canonical_url,
-        publish_date=extracted.publish_date,
-        generated_date=sources["generated_date"],
-    )
-    markdown_path = _unique_path(output_path, base_name, ".md")
-    markdown_path.write_text(markdown, encoding="utf-8")
-
-    metadata_path = _unique_path(output_path, base_name, ".json")
-    metadata_path.write_text(
-        json.dumps(extracted.model_dump(), ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
 
-    return SkillResult(
-        markdown_path=str(markdown_path),
-        assets_dir=str(assets_dir),
-        metadata_path=str(metadata_path),
-    )
+def _write_bundle(
+    bundle_dir: Path,
+    url: str,
+    base_name: str,
+    markdown: str,
+    metadata_json: str,
+    manifest: ChunkManifest,
+    assets_dir: Path,
+) -> tuple[str, str]:
+    with Bundle(bundle_dir) as store:
+        base_name = store.unique_base_name(base_name, url)
+        manifest.markdown_path = f"{base_name}.md"
+        files: dict[str, bytes | Path] = {
+            f"{base_name}.md": markdown.encode("utf-8"),
+            f"{base_name}.json": metadata_json.encode("utf-8"),
+            f"{base_name}.chunks.json": json.dumps(
+                manifest.model_dump(), ensure_ascii=False, indent=2
+            ).encode("utf-8"),
+        }
+        for path in sorted(assets_dir.iterdir()):
+            files[f"{assets_dir.name}/{path.name}"] = path
+        added = store.add(url, base_name, files)
+    return base_name, added["segment"]
 
 
 def _build_content_markdown(
@@ -231,13 +408,88 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Use headless browser fallback on 401/403 responses",
     )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=FETCH_MAX_BYTES,
+        help="Max bytes of HTML to download (0 for no limit)",
+    )
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        default=FETCH_HEDGE_AFTER_SECONDS,
+        help="Start the next fetch path after this many seconds (0 to disable)",
+    )
+    parser.add_argument(
+        "--proxy-on-network-error",
+        action="store_true",
+        help="Also fall back to the Jina proxy on connection errors and timeouts, not only on 401/403",
+    )
+    parser.add_argument(
+        "--no-extract-cache",
+        action="store_true",
+        help="Always re-run extraction instead of reusing cached results",
+    )
+    parser.add_argument(
+        "--keep-boilerplate",
+        action="store_true",
+        help="Keep blocks that repeat across most pages of the same domain",
+    )
+    parser.add_argument(
+        "--summary-budget",
+        type=int,
+        default=None,
+        help="Token budget for the condensed digest in the chunk manifest",
+    )
+    parser.add_argument(
+        "--translate",
+        choices=sorted(BACKENDS),
+        default=TRANSLATE_BACKEND,
+        help="Translation backend for blocks not in --lang (stub is a local test backend)",
+    )
+    parser.add_argument(
+        "--translate-url",
+        default=None,
+        help="Endpoint for the http translation backend (default: $HTML2MD_TRANSLATE_URL)",
+    )
+    parser.add_argument(
+        "--translate-workers",
+        type=int,
+        default=TRANSLATE_WORKERS,
+        help="Concurrent translation requests",
+    )
+    parser.add_argument(
+        "--glossary",
+        default=str(TRANSLATE_GLOSSARY_PATH),
+        help="mdcn2en glossary.jsonl applied when translating Chinese blocks",
+    )
+    parser.add_argument(
+        "--profiles",
+        default=str(EXTRACT_PROFILES_PATH),
+        help="JSON file of per-domain extraction selectors tried before the generic extractors",
+    )
+    parser.add_argument(
+        "--no-profiles",
+        action="store_true",
+        help="Always use the generic extractors",
+    )
+    parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help="Append outputs to indexed tar segments in <out>/bundles/ instead of one file set per page",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Print per-stage timings, including media/text overlap, as JSON",
+    )
     return parser
 
 
 def main() -> None:
     parser = _build_arg_parser()
     args = parser.parse_args()
-    run_skill(
+    result = run_skill(
         url=args.url,
         output_dir=args.out,
         topic_focus=args.topic,
@@ -246,7 +498,26 @@ def main() -> None:
         max_videos=args.max_videos,
         skip_media=args.no_media,
         use_headless=args.headless,
+        max_bytes=args.max_bytes,
+        hedge_after=args.hedge_after,
+        proxy_on_network_error=args.proxy_on_network_error,
+        use_extract_cache=not args.no_extract_cache,
+        strip_boilerplate=not args.keep_boilerplate,
+        summary_budget=args.summary_budget,
+        translate_backend=args.translate,
+        translate_url=args.translate_url,
+        translate_workers=args.translate_workers,
+        glossary_path=args.glossary,
+        profiles_path=None if args.no_profiles else args.profiles,
+        bundle=args.bundle,
     )
+    if args.timings and result.timings:
+        print(json.dumps(result.timings.model_dump(), indent=2))
+    if result.translation_failed:
+        print(
+            f"Warning: translation failed for {result.translation_failed} block(s); they kept their source text",
+            file=sys.stderr,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+"""Per-stage wall-clock timings for overlapping pipeline tracks."""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+from models import PipelineTimings, StageTiming
+
+T = TypeVar("T")
+
+WAIT_STAGE = "media_wait"
+
+
+class StageTimer:
+    """Records stages on the main track and on the background media track."""
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter()
+        self._stages: list[tuple[str, str, float, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, track: str = "main") -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, track, start, time.perf_counter())
+
+    def wrap(self, name: str, fn: Callable[..., T], track: str = "media") -> Callable[..., T]:
+        def run(*args, **kwargs) -> T:
+            with self.stage(name, track):
+                return fn(*args, **kwargs)
+
+        return run
+
+    def report(self) -> PipelineTimings:
+        # A stage's overlap is the time it shared with any stage of the other track.
+        with self._lock:
+            stages = list(self._stages)
+        # Waiting on the media track is not useful work, so it never counts as overlap.
+        by_track: dict[str, list[tuple[float, float]]] = {}
+        for name, track, start, end in stages:
+            if name != WAIT_STAGE:
+                by_track.setdefault(track, []).append((start, end))
+        merged = {track: _merge(spans) for track, spans in by_track.items()}
+
+        timings: list[StageTiming] = []
+        for name, track, start, end in sorted(stages, key=lambda s: s[2]):
+            others = [span for other, spans in merged.items() if other != track for span in spans]
+            shared = 0.0 if name == WAIT_STAGE else _overlap((start, end), _merge(others))
+            timings.append(
+                StageTiming(
+                    name=name,
+                    track=track,
+                    start=round(start - self._origin, 4),
+                    end=round(end - self._origin, 4),
+                    seconds=round(end - start, 4),
+                    overlap_seconds=round(shared, 4),
+                )
+            )
+        main, media = merged.get("main", []), merged.get("media", [])
+        overlap = sum(_overlap(span, media) for span in main)
+        return PipelineTimings(
+            total_seconds=round(time.perf_counter() - self._origin, 4),
+            stages=timings,
+            overlap_seconds=round(overlap, 4),
+            media_wait_seconds=round(sum(t.seconds for t in timings if t.name == WAIT_STAGE), 4),
+        )
+
+    def _record(self, name: str, track: str, start: float, end: float) -> None:
+        with self._lock:
+            self._stages.append((name, track, start, end))
+
+
+def _merge(spans: list[tuple[float, float]]) -> list[tuple[float, float]]:
+    merged: list[tuple[float, float]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _overlap(span: tuple[float, float], others: list[tuple[float, float]]) -> float:
+    start, end = span
+    return sum(max(0.0, min(end, o_end) - max(start, o_start)) for o_start, o_end in others)
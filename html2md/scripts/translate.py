@@ -2,10 +2,336 @@
 
 from __future__ import annotations
 
-from langdetect import detect
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
+import requests
+from langdetect import DetectorFactory, detect
+
+from cache_budget import CacheBudget
+from config import (
+    DEFAULT_LANGUAGE,
+    MDCN2EN_SCRIPTS_DIR,
+    TRANSLATE_BACKEND,
+    TRANSLATE_BATCH_BLOCKS,
+    TRANSLATE_BATCH_CHARS,
+    TRANSLATE_CACHE_MAX_BYTES,
+    TRANSLATE_CACHE_VERSION,
+    TRANSLATE_GLOSSARY_PATH,
+    TRANSLATE_TIMEOUT_SECONDS,
+    TRANSLATE_WORKERS,
+)
 from models import ContentBlock
 
+# langdetect is randomized; a fixed seed keeps block languages stable across runs.
+DetectorFactory.seed = 0
+
+logger = logging.getLogger(__name__)
+
+_SKIP_LANGUAGES = {"unknown"}
+_CACHE_SUFFIX = ".txt"
+
+
+class TranslationBackend(ABC):
+    """Translates a batch of texts from one language into another."""
+
+    name = "base"
+
+    @property
+    def identity(self) -> str:
+        """Distinguishes cached output of differently configured instances."""
+        return self.name
+
+    @abstractmethod
+    def translate_batch(
+        self,
+        texts: list[str],
+        source_lang: str,
+        target_lang: str,
+        glossary: dict[str, str],
+    ) -> list[str]:
+        """Return one translation per text, in order. ``glossary`` maps source terms to required target terms."""
+
+
+class PassthroughBackend(TranslationBackend):
+    name = "none"
+
+    def translate_batch(self, texts, source_lang, target_lang, glossary):
+        return list(texts)
+
+
+class StubBackend(TranslationBackend):
+    """Local backend for tests: applies glossary terms and tags the language pair."""
+
+    name = "stub"
+
+    def translate_batch(self, texts, source_lang, target_lang, glossary):
+        terms = sorted(glossary, key=len, reverse=True)
+        output = []
+        for text in texts:
+            for term in terms:
+                text = text.replace(term, f" {glossary[term]} ")
+            output.append(f"[{source_lang}->{target_lang}] " + " ".join(text.split()))
+        return output
+
+
+class HttpBackend(TranslationBackend):
+    """POSTs {"source_lang", "target_lang", "texts", "glossary"} and expects {"translations": [...]}."""
+
+    name = "http"
+
+    def __init__(self, url: str | None = None, timeout: float = TRANSLATE_TIMEOUT_SECONDS) -> None:
+        self.url = url or os.environ.get("HTML2MD_TRANSLATE_URL")
+        if not self.url:
+            raise ValueError("The http translation backend needs --translate-url or HTML2MD_TRANSLATE_URL")
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.url}"
+
+    def translate_batch(self, texts, source_lang, target_lang, glossary):
+        response = self._session.post(
+            self.url,
+            json={
+                "source_lang": source_lang,
+                "target_lang": target_lang,
+                "texts": texts,
+                "glossary": glossary,
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        translations = response.json().get("translations")
+        if not isinstance(translations, list) or len(translations) != len(texts):
+            raise ValueError("Translation service returned a malformed batch")
+        return [str(text) for text in translations]
+
+
+BACKENDS: dict[str, type[TranslationBackend]] = {
+    PassthroughBackend.name: PassthroughBackend,
+    StubBackend.name: StubBackend,
+    HttpBackend.name: HttpBackend,
+}
+
+
+def get_backend(name: str = TRANSLATE_BACKEND, url: str | None = None) -> TranslationBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown translation backend: {name} (choose from {', '.join(BACKENDS)})")
+    if name == HttpBackend.name:
+        return HttpBackend(url)
+    return BACKENDS[name]()
+
+
+class Translator:
+    """Batches, caches and runs translations of document blocks through a backend."""
+
+    def __init__(
+        self,
+        backend: TranslationBackend,
+        target_lang: str = DEFAULT_LANGUAGE,
+        cache_dir: str | Path | None = None,
+        batch_chars: int = TRANSLATE_BATCH_CHARS,
+        batch_blocks: int = TRANSLATE_BATCH_BLOCKS,
+        workers: int = TRANSLATE_WORKERS,
+        glossary_path: str | Path | None = TRANSLATE_GLOSSARY_PATH,
+        cache_max_bytes: int = TRANSLATE_CACHE_MAX_BYTES,
+    ) -> None:
+        self.backend = backend
+        self.target_lang = target_lang
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.budget = CacheBudget(self.cache_dir, cache_max_bytes, _CACHE_SUFFIX) if self.cache_dir else None
+        self.batch_chars = batch_chars
+        self.batch_blocks = batch_blocks
+        self.workers = max(1, workers)
+        self.glossary_path = Path(glossary_path) if glossary_path else None
+        self._matcher = None
+        self._matcher_loaded = False
+        self.stats = {"blocks": 0, "cached": 0, "translated": 0, "batches": 0, "failed": 0}
+
+    def translate(self, texts: list[str], source_lang: str) -> list[str]:
+        return self.translate_groups({source_lang: texts})[source_lang]
+
+    def translate_groups(self, groups: dict[str, list[str]]) -> dict[str, list[str]]:
+        """Translate texts grouped by source language.
+
+        Failed batches keep their source text; each one is logged as a warning
+        and counted in ``stats["failed"]``.
+        """
+        results: dict[tuple[str, str], str] = {}
+        batches: list[tuple[str, list[tuple[str, dict[str, str], str]]]] = []
+        for source_lang, texts in groups.items():
+            if self.backend.name == PassthroughBackend.name or not _needs_translation(source_lang, self.target_lang):
+                continue
+            matcher = self.glossary_for(source_lang)
+            pending: list[tuple[str, dict[str, str], str]] = []
+            for text in dict.fromkeys(texts):
+                terms = matcher.annotate(text) if matcher else {}
+                key = self._cache_key(text, source_lang, terms)
+                cached = self._cache_get(key)
+                if cached is not None:
+                    results[(source_lang, text)] = cached
+                    self.stats["cached"] += 1
+                else:
+                    pending.append((text, terms, key))
+            self.stats["blocks"] += len(texts)
+            batches.extend((source_lang, batch) for batch in self._pack(pending))
+
+        self.stats["batches"] += len(batches)
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+                futures = [executor.submit(self._run_batch, batch, source_lang) for source_lang, batch in batches]
+                for (source_lang, batch), future in zip(batches, futures):
+                    try:
+                        translated = future.result()
+                    except (requests.RequestException, ValueError) as exc:
+                        logger.warning(
+                            "Translation of %d %s block(s) failed, keeping the source text: %s",
+                            len(batch),
+                            source_lang,
+                            exc,
+                        )
+                        self.stats["failed"] += len(batch)
+                        continue
+                    for (text, _, key), translation in zip(batch, translated):
+                        results[(source_lang, text)] = translation
+                        self._cache_put(key, translation)
+                        self.stats["translated"] += 1
+        return {
+            source_lang: [results.get((source_lang, text), text) for text in texts]
+            for source_lang, texts in groups.items()
+        }
+
+    def glossary_for(self, source_lang: str):
+        """Return the mdcn2en GlossaryMatcher for this pair, or None.
+
+        The term base is zh -> en, so it only applies to that pair. Terms
+        resolve leftmost-longest, as in mdcn2en's extract_cn_blocks.py.
+        """
+        if _base_language(source_lang) != "zh" or _base_language(self.target_lang) != "en":
+            return None
+        if not self._matcher_loaded:
+            self._matcher = load_glossary(self.glossary_path)
+            self._matcher_loaded = True
+        return self._matcher
+
+    def _run_batch(self, batch: list[tuple[str, dict[str, str], str]], source_lang: str) -> list[str]:
+        texts = [text for text, _, _ in batch]
+        glossary: dict[str, str] = {}
+        for _, terms, _ in batch:
+            glossary.update(terms)
+        translated = self.backend.translate_batch(texts, source_lang, self.target_lang, glossary)
+        if len(translated) != len(texts):
+            raise ValueError(f"Backend {self.backend.name} returned {len(translated)} texts for {len(texts)}")
+        return translated
+
+    def _pack(self, pending: list[tuple[str, dict[str, str], str]]) -> list[list[tuple[str, dict[str, str], str]]]:
+        batches: list[list[tuple[str, dict[str, str], str]]] = []
+        current: list[tuple[str, dict[str, str], str]] = []
+        size = 0
+        for item in pending:
+            length = len(item[0])
+            if current and (size + length > self.batch_chars or len(current) >= self.batch_blocks):
+                batches.append(current)
+                current, size = [], 0
+            current.append(item)
+            size += length
+        if current:
+            batches.append(current)
+        return batches
+
+    def _cache_key(self, text: str, source_lang: str, terms: dict[str, str]) -> str:
+        digest = hashlib.sha256()
+        for part in (
+            f"cache={TRANSLATE_CACHE_VERSION}",
+            self.backend.identity,
+            source_lang,
+            self.target_lang,
+            json.dumps(terms, ensure_ascii=False, sort_keys=True),
+            text,
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _cache_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{_CACHE_SUFFIX}"
+
+    def _cache_get(self, key: str) -> str | None:
+        if not self.cache_dir:
+            return None
+        path = self._cache_path(key)
+        try:
+            translation = path.read_text(encoding="utf-8")
+            os.utime(path)
+        except OSError:
+            return None
+        return translation
+
+    def _cache_put(self, key: str, translation: str) -> None:
+        if not self.cache_dir:
+            return
+        path = self._cache_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(translation, encoding="utf-8")
+        self.budget.replace(tmp_path, path)
+
+
+def load_glossary(path: str | Path | None):
+    """Load an mdcn2en glossary.jsonl through mdcn2en's own GlossaryMatcher.
+
+    Returns None when there is no glossary or the mdcn2en skill is not installed.
+    """
+    if not path or not Path(path).exists():
+        return None
+    try:
+        store = _load_mdcn2en_module("glossary_store")
+        matcher = _load_mdcn2en_module("glossary_matcher", {"glossary_store": store})
+    except ImportError:
+        return None
+    return matcher.GlossaryMatcher.load(Path(path))
+
+
+def _load_mdcn2en_module(name: str, imports: dict | None = None):
+    """Import an mdcn2en script by file path, without adding its directory to sys.path.
+
+    The module is registered as ``mdcn2en_<name>``; ``imports`` maps the bare
+    names it imports to already loaded modules while it executes.
+    """
+    module_name = f"mdcn2en_{name}"
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    path = MDCN2EN_SCRIPTS_DIR / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None or not path.exists():
+        raise ImportError(f"mdcn2en module not found: {path}")
+    module = importlib.util.module_from_spec(spec)
+    aliases = imports or {}
+    shadowed = {alias: sys.modules.get(alias) for alias in aliases}
+    sys.modules[module_name] = module
+    sys.modules.update(aliases)
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    finally:
+        for alias, previous in shadowed.items():
+            if previous is None:
+                sys.modules.pop(alias, None)
+            else:
+                sys.modules[alias] = previous
+    return module
+
 
 def detect_language(text: str) -> str:
     try:
@@ -14,16 +340,37 @@ def detect_language(text: str) -> str:
         return "unknown"
 
 
-def translate_to_en(text: str, source_lang: str) -> str:
-    if source_lang in {"en", "unknown"}:
+def translate_to_en(text: str, source_lang: str, translator: Translator | None = None) -> str:
+    if translator is None or not _needs_translation(source_lang, DEFAULT_LANGUAGE):
         return text
-    return text
+    return translator.translate([text], source_lang)[0]
+
 
+def normalize_blocks(blocks: list[ContentBlock], translator: Translator | None = None) -> list[ContentBlock]:
+    languages = [detect_language(block.text) for block in blocks]
+    texts = [block.text for block in blocks]
+    if translator is not None:
+        by_language: dict[str, list[int]] = {}
+        for index, language in enumerate(languages):
+            by_language.setdefault(language, []).append(index)
+        translated = translator.translate_groups(
+            {language: [texts[i] for i in indexes] for language, indexes in by_language.items()}
+        )
+        for language, indexes in by_language.items():
+            for index, text in zip(indexes, translated[language]):
+                texts[index] = text
 
-def normalize_blocks(blocks: list[ContentBlock]) -> list[ContentBlock]:
     normalized: list[ContentBlock] = []
-    for block in blocks:
-        language = detect_language(block.text)
-        text = translate_to_en(block.text, language)
+    for block, language, text in zip(blocks, languages, texts):
         normalized.append(ContentBlock(text=text, language=language, score=block.score))
     return normalized
+
+
+def _base_language(language: str) -> str:
+    return language.split("-")[0].lower()
+
+
+def _needs_translation(source_lang: str, target_lang: str) -> bool:
+    if source_lang in _SKIP_LANGUAGES:
+        return False
+    return _base_language(source_lang) != _base_language(target_lang)
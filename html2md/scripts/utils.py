@@ -4,8 +4,16 @@ from __future__ import annotations
 
 import re
 import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
 from urllib.parse import urlparse
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
 
 def slugify(value: str) -> str:
     value = unicodedata.normalize("NFKD", value)
@@ -22,8 +30,25 @@ def build_output_basename(
     publish_date: str | None,
     generated_date: str,
 ) -> str:
-    domain = urlparse(source_url).hostname or "source"
-    domain = domain.replace("www.", "")
+    domain = source_domain(source_url)
     date_part = (publish_date or generated_date).replace("-", "")
     title_part = slugify(title)
     return f"{date_part}-{domain}-{title_part}"
+
+
+def source_domain(url: str) -> str:
+    domain = urlparse(url).hostname or "source"
+    return domain.replace("www.", "")
+
+
+@contextmanager
+def file_lock(lock_path: str | Path) -> Iterator[None]:
+    """Hold an exclusive flock on ``lock_path`` so other processes wait for us."""
+    with open(lock_path, "w") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -7,6 +7,9 @@ Usage (batch dict):
 Input formats supported:
 - JSON dict: {"术语": "Term", "科研": "research"}
 - JSON list: [{"zh": "术语", "en": "Term", "source": "...", "context": "..."}, ...]
+
+Entries whose zh term already maps to the same en term are skipped. The batch
+is appended under an exclusive lock, so parallel jobs can append safely.
 """
 
 from __future__ import annotations
@@ -17,12 +20,15 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Iterable, List
 
+from glossary_store import DEFAULT_GLOSSARY_PATH, GlossaryStore
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Append glossary terms to glossary.jsonl")
     parser.add_argument("--input", required=True, help="Path to glossary JSON file")
     parser.add_argument("--source", help="Default source for dict input")
     parser.add_argument("--context", help="Default context for dict input")
+    parser.add_argument("--glossary", default=str(DEFAULT_GLOSSARY_PATH), help="Path to glossary.jsonl")
     return parser.parse_args()
 
 
@@ -76,13 +82,10 @@ def main() -> int:
     data = json.loads(input_path.read_text(encoding="utf-8"))
     entries = normalize_entries(data, args.source, args.context)
 
-    glossary_path = Path(__file__).resolve().parents[1] / "references" / "glossary.jsonl"
-    glossary_path.parent.mkdir(parents=True, exist_ok=True)
-
-    with glossary_path.open("a", encoding="utf-8") as f:
-        for entry in entries:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    store = GlossaryStore(Path(args.glossary).resolve())
+    appended = store.append(entries)
 
+    print(json.dumps({"appended": len(appended), "skipped": len(entries) - len(appended)}))
     return 0
 
 
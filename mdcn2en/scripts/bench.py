@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""Benchmark and scaling suite for the mdcn2en scripts.
+
+Usage:
+  python scripts/bench.py generate --size 10MB --output /tmp/doc.md [--seed 1]
+  python scripts/bench.py run [--sizes 256KB,2MB,16MB] [--work /tmp/cn2en-bench] [--check] [--save-baseline]
+
+generate writes a synthetic Chinese Markdown document of about --size bytes:
+front matter, headings, paragraphs mixing Chinese and English with inline
+code, links, URLs and emphasis, lists, task lists, quotes, tables and fenced
+code. Output is streamed, so sizes of hundreds of MB are fine.
+
+run generates one document per size and times each script as a subprocess:
+append_glossary.py, extract_cn_blocks.py, extract_blocks_from_json.py (plain
+and --terms) and insert_en_blocks.py. Every stage reports wall time, peak RSS,
+and MB/s and items/s over its own inputs (glossary entries for
+append_glossary.py, blocks otherwise); a log-log fit over the sizes gives its
+scaling exponent with interpreter startup subtracted (1.0 is linear, 2.0
+quadratic).
+
+Known quadratic hot spots are tracked as in-process cases timed at n and 4n,
+so an exponent creeping up shows as a regression even when the end-to-end
+sizes are too small to notice it.
+
+Results are compared with references/bench_baseline.json: a throughput drop
+or peak RSS growth beyond --tolerance, or an exponent more than
+--exponent-slack above the baseline, is reported under "regressions" (exit
+status 1 with --check). A case exponent above --max-case-exponent is a
+regression whatever the baseline says, and such a run is never saved as
+the baseline. --save-baseline records the current run instead.
+Baselines are machine specific; re-save them when moving to new hardware.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from blocks_io import iter_records, read_blocks, write_blocks
+from extract_cn_blocks import extract
+from glossary_matcher import GlossaryMatcher
+from glossary_store import GlossaryStore
+from inline_mask import SENTINEL_RE, mask_inline
+from insert_en_blocks import insert_blocks
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE_PATH = SCRIPTS_DIR.parent / "references" / "bench_baseline.json"
+DEFAULT_SIZES = "256KB,2MB,16MB"
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_EXPONENT_SLACK = 0.3
+DEFAULT_MAX_CASE_EXPONENT = 1.3
+CASE_REPEATS = 3
+SIZE_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*(B|KB|MB|GB)?$", re.IGNORECASE)
+SIZE_UNITS = {"B": 1, "KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+WORDS = [
+    "科研", "技能", "文档", "翻译", "模型", "数据", "流程", "工具", "配置", "测试",
+    "性能", "缓存", "索引", "术语", "段落", "标题", "列表", "示例", "项目", "结果",
+]
+GLUE = ["的", "和", "在", "是", "把", "对", "与", "中", "了", "将"]
+ENGLISH = ["Claude", "Python", "API", "Markdown", "JSON", "GPU", "token", "pipeline", "CLI", "SQLite"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the mdcn2en scripts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate")
+    gen.add_argument("--size", required=True, help="Target size, e.g. 512KB or 200MB")
+    gen.add_argument("--output", required=True, help="Path to the generated Markdown file")
+    gen.add_argument("--seed", type=int, default=1, help="Random seed")
+    run = sub.add_parser("run")
+    run.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated document sizes")
+    run.add_argument("--work", help="Work directory (default: a temporary directory)")
+    run.add_argument("--seed", type=int, default=1, help="Random seed")
+    run.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="Path to baseline JSON")
+    run.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    run.add_argument("--check", action="store_true", help="Exit with status 1 when a regression is found")
+    run.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed throughput/RSS change")
+    run.add_argument("--exponent-slack", type=float, default=DEFAULT_EXPONENT_SLACK, help="Allowed exponent increase")
+    run.add_argument("--max-case-exponent", type=float, default=DEFAULT_MAX_CASE_EXPONENT, help="Highest exponent a scaling case may reach")
+    run.add_argument("--skip-cases", action="store_true", help="Skip the in-process scaling cases")
+    run.add_argument("--report", help="Also write the JSON report to this path")
+    return parser.parse_args()
+
+
+def parse_size(value: str) -> int:
+    m = SIZE_RE.match(value.strip())
+    if not m:
+        raise SystemExit(f"Invalid size: {value}")
+    return int(float(m.group(1)) * SIZE_UNITS[(m.group(2) or "B").upper()])
+
+
+# --- synthetic documents -------------------------------------------------
+
+def _phrase(rng: random.Random, words: int) -> str:
+    parts = []
+    for _ in range(words):
+        parts.append(rng.choice(WORDS))
+        if rng.random() < 0.4:
+            parts.append(rng.choice(GLUE))
+    return "".join(parts)
+
+
+def _sentence(rng: random.Random) -> str:
+    text = _phrase(rng, rng.randint(3, 12))
+    roll = rng.random()
+    if roll < 0.2:
+        text += f" `{rng.choice(ENGLISH).lower()}_{rng.randint(1, 99)}()` " + _phrase(rng, 3)
+    elif roll < 0.35:
+        text += f"，见 [{_phrase(rng, 2)}](https://example.com/{rng.randint(1, 9999)})"
+    elif roll < 0.45:
+        text += f" https://docs.example.org/p/{rng.randint(1, 9999)} " + _phrase(rng, 2)
+    elif roll < 0.6:
+        text += f" **{_phrase(rng, 2)}** {rng.choice(ENGLISH)} " + _phrase(rng, 2)
+    elif roll < 0.7:
+        text += " <kbd>Ctrl</kbd> " + _phrase(rng, 2)
+    return text + "。"
+
+
+def _section(rng: random.Random, number: int) -> Iterator[str]:
+    yield f"{'#' * rng.randint(1, 3)} {number}. {_phrase(rng, 3)}"
+    yield ""
+    for _ in range(rng.randint(1, 3)):
+        yield "".join(_sentence(rng) for _ in range(rng.randint(1, 4)))
+        yield ""
+    kind = rng.randrange(6)
+    if kind == 0:
+        for _ in range(rng.randint(2, 6)):
+            yield f"- {_sentence(rng)}"
+    elif kind == 1:
+        for i in range(rng.randint(2, 5)):
+            yield f"{i + 1}. {_sentence(rng)}"
+        yield f"- [{'x' if rng.random() < 0.5 else ' '}] {_phrase(rng, 4)}"
+    elif kind == 2:
+        for _ in range(rng.randint(1, 3)):
+            yield f"> {_sentence(rng)}"
+    elif kind == 3:
+        yield f"| {_phrase(rng, 1)} | {_phrase(rng, 1)} | Value |"
+        yield "| --- | --- | --- |"
+        for _ in range(rng.randint(2, 5)):
+            yield f"| {_phrase(rng, 2)} | `{rng.choice(ENGLISH)}` | {rng.randint(1, 1000)} |"
+    elif kind == 4:
+        yield "```python"
+        yield f"# {_phrase(rng, 3)}"
+        yield f"print(\"{_phrase(rng, 2)}\")"
+        yield "```"
+    else:
+        yield f"{rng.choice(ENGLISH)} and {rng.choice(ENGLISH)} are used {_phrase(rng, 2)} in this {rng.choice(ENGLISH)} setup."
+    yield ""
+
+
+def generate_markdown(path: Path, size: int, seed: int = 1) -> Dict[str, int]:
+    rng = random.Random(seed)
+    written = 0
+    sections = 0
+    with path.open("w", encoding="utf-8") as f:
+        header = f"---\ntitle: {_phrase(rng, 3)}\ntags: [{_phrase(rng, 1)}, benchmark]\n---\n\n"
+        f.write(header)
+        written += len(header.encode("utf-8"))
+        while written < size:
+            sections += 1
+            chunk = "\n".join(_section(rng, sections)) + "\n"
+            f.write(chunk)
+            written += len(chunk.encode("utf-8"))
+    return {"bytes": written, "sections": sections}
+
+
+def write_glossary_input(path: Path, count: int, seed: int) -> int:
+    rng = random.Random(seed)
+    entries = [
+        {"zh": _phrase(rng, 2) + str(i), "en": f"term {i}", "source": "bench", "context": "synthetic"}
+        for i in range(count)
+    ]
+    entries.extend({"zh": w, "en": f"{w} term", "source": "bench", "context": "synthetic"} for w in WORDS)
+    path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+    return len(entries)
+
+
+def write_fake_translations(pending_path: Path, output_path: Path) -> int:
+    # English stand-ins that keep every sentinel, like a careful translator.
+    def translate() -> Iterator[dict]:
+        for record in read_blocks(pending_path):
+            sentinels = " ".join(m.group(0) for m in SENTINEL_RE.finditer(record["text"]))
+            yield {"placeholder": record["placeholder"], "text": f"Block {record['index']} {sentinels}".rstrip()}
+
+    return write_blocks(output_path, translate())
+
+
+# --- end-to-end stages ---------------------------------------------------
+
+def run_script(name: str, args: List[str], log_path: Path) -> Dict[str, float]:
+    cmd = [sys.executable, str(SCRIPTS_DIR / name), *args]
+    with log_path.open("w", encoding="utf-8") as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise SystemExit(f"{name} failed ({proc.returncode}), see {log_path}")
+    # ru_maxrss is in KB on Linux and in bytes on macOS.
+    rss = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    return {"seconds": round(elapsed, 4), "peak_rss_mb": round(rss / (1 << 20), 2)}
+
+
+def measure_startup(work: Path) -> Dict[str, float]:
+    startup = {}
+    for name in ("append_glossary.py", "extract_cn_blocks.py", "extract_blocks_from_json.py", "insert_en_blocks.py"):
+        runs = [run_script(name, ["--help"], work / "startup.log")["seconds"] for _ in range(3)]
+        startup[name] = min(runs)
+    return startup
+
+
+def run_size(work: Path, size: int, seed: int) -> Dict[str, dict]:
+    label = format_size(size)
+    doc = work / f"doc-{label}.md"
+    skeleton = work / f"doc-{label}.en.md"
+    blocks = work / f"doc-{label}.en.blocks.jsonl"
+    pending = work / f"doc-{label}.pending.jsonl"
+    translations = work / f"doc-{label}.translations.jsonl"
+    glossary_input = work / f"glossary-{label}.json"
+    glossary = work / f"glossary-{label}.jsonl"
+    for stale in (glossary, glossary.with_suffix(".index.json"), glossary.with_suffix(".automaton.pickle")):
+        if stale.exists():
+            stale.unlink()
+
+    info = generate_markdown(doc, size, seed)
+    terms = write_glossary_input(glossary_input, max(50, info["sections"] // 4), seed)
+    log = work / "stage.log"
+    stages: Dict[str, dict] = {}
+    # Input bytes are taken before each run, since insert overwrites its inputs.
+    inputs: Dict[str, int] = {}
+
+    inputs["append_glossary"] = _total_bytes(glossary_input)
+    stages["append_glossary"] = run_script(
+        "append_glossary.py", ["--input", str(glossary_input), "--glossary", str(glossary)], log
+    )
+    inputs["extract"] = _total_bytes(doc)
+    stages["extract"] = run_script(
+        "extract_cn_blocks.py", ["--input", str(doc), "--output", str(skeleton), "--blocks", str(blocks), "--no-memory"], log
+    )
+    count = sum(1 for _ in read_blocks(blocks))
+    inputs["list"] = _total_bytes(blocks)
+    stages["list"] = run_script(
+        "extract_blocks_from_json.py", ["--input", str(blocks), "--jsonl", "--output", str(pending)], log
+    )
+    inputs["list_terms"] = _total_bytes(blocks, glossary)
+    stages["list_terms"] = run_script(
+        "extract_blocks_from_json.py",
+        ["--input", str(blocks), "--terms", "--glossary", str(glossary), "--output", os.devnull],
+        log,
+    )
+    write_fake_translations(pending, translations)
+    inputs["insert"] = _total_bytes(skeleton, translations, blocks)
+    stages["insert"] = run_script(
+        "insert_en_blocks.py",
+        ["--input", str(skeleton), "--translations", str(translations), "--blocks", str(blocks), "--no-memory"],
+        log,
+    )
+
+    for name, stage in stages.items():
+        items = terms if name == "append_glossary" else count
+        stage.update(
+            input_bytes=inputs[name],
+            items=items,
+            mb_per_s=round(inputs[name] / (1 << 20) / stage["seconds"], 3) if stage["seconds"] else None,
+            items_per_s=round(items / stage["seconds"], 1) if stage["seconds"] else None,
+        )
+    return stages
+
+
+def _total_bytes(*paths: Path) -> int:
+    return sum(p.stat().st_size for p in paths if p.exists())
+
+
+def scaling_exponent(points: List[tuple]) -> Optional[float]:
+    # Least-squares slope of log(seconds) over log(blocks).
+    points = [(x, y) for x, y in points if x > 0 and y > 0.005]
+    if len(points) < 2:
+        return None
+    xs = [math.log(x) for x, _ in points]
+    ys = [math.log(y) for _, y in points]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    var = sum((x - mx) ** 2 for x in xs)
+    if not var:
+        return None
+    return round(sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var, 3)
+
+
+# --- tracked scaling cases -----------------------------------------------
+
+def _case_insert_one_line(n: int) -> Callable[[], None]:
+    # The historical str.replace-per-placeholder loop was quadratic here.
+    placeholders = [f"[[CN2EN_BLOCK_{i:04d}]]" for i in range(1, n + 1)]
+    line = " ".join(placeholders) + "\n"
+    translations = {p: f"Block {i}" for i, p in enumerate(placeholders)}
+    return lambda: insert_blocks([line], translations, io.StringIO())
+
+
+def _case_insert_many_lines(n: int) -> Callable[[], None]:
+    lines = [f"- [[CN2EN_BLOCK_{i:04d}]]\n" for i in range(1, n + 1)]
+    translations = {f"[[CN2EN_BLOCK_{i:04d}]]": f"Block {i}" for i in range(1, n + 1)}
+    return lambda: insert_blocks(lines, translations, io.StringIO())
+
+
+def _case_mask_long_line(n: int) -> Callable[[], None]:
+    line = "".join(f"说明 `code_{i}` 见 https://example.com/{i} 。" for i in range(n))
+    return lambda: mask_inline(line)
+
+
+def _case_update_duplicate_blocks(n: int) -> Callable[[], None]:
+    # Identical blocks share one candidate list in index_previous.
+    lines = ["重复的段落"] * n
+    previous = [{"index": i, "placeholder": f"[[CN2EN_BLOCK_{i:04d}]]", "text": "重复的段落"} for i in range(1, n + 1)]
+    return lambda: extract(lines, io.StringIO(), lambda b: None, mask=False, previous=iter(previous))
+
+
+def _case_glossary_match(n: int) -> Callable[[], None]:
+    terms = {"科" * k: str(k) for k in range(1, 9)}
+    terms.update((w, w) for w in WORDS)
+    matcher = GlossaryMatcher(terms)
+    text = "科" * n
+    return lambda: matcher.find(text)
+
+
+def _case_glossary_append_one_by_one(n: int) -> Callable[[], None]:
+    # Appends used to rewrite the whole index each time, which grew as n^2.
+    def run() -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = GlossaryStore(Path(tmp) / "glossary.jsonl")
+            for i in range(n):
+                store.append([{"zh": f"术语{i}", "en": f"term {i}", "source": "bench", "context": "synthetic"}])
+    return run
+
+
+def _case_read_large_record(n: int) -> Callable[[], None]:
+    # Smaller records fit in the CPU cache at n but not at 4n, which skews the fit.
+    payload = json.dumps({"index": 1, "text": "中" * n}, ensure_ascii=False) + "\n"
+    return lambda: sum(1 for _ in iter_records(io.StringIO(payload)))
+
+
+CASES: Dict[str, tuple] = {
+    "insert_one_line": (_case_insert_one_line, 5000),
+    "insert_many_lines": (_case_insert_many_lines, 50000),
+    "mask_long_line": (_case_mask_long_line, 5000),
+    "update_duplicate_blocks": (_case_update_duplicate_blocks, 20000),
+    "glossary_match": (_case_glossary_match, 50000),
+    "glossary_append_one_by_one": (_case_glossary_append_one_by_one, 100),
+    "read_large_record": (_case_read_large_record, 8000000),
+}
+
+
+def _best_of(fn: Callable[[], None]) -> float:
+    best = math.inf
+    for _ in range(CASE_REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_cases() -> Dict[str, dict]:
+    results = {}
+    for name, (factory, n) in CASES.items():
+        small = _best_of(factory(n))
+        large = _best_of(factory(4 * n))
+        results[name] = {
+            "n": n,
+            "seconds": round(small, 5),
+            "seconds_4n": round(large, 5),
+            "exponent": round(math.log(large / small, 4), 3) if small > 0 else None,
+        }
+    return results
+
+
+# --- baseline comparison -------------------------------------------------
+
+def format_size(size: int) -> str:
+    for unit in ("GB", "MB", "KB"):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f"{size // SIZE_UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def compare(report: dict, baseline: dict, tolerance: float, slack: float) -> List[str]:
+    regressions: List[str] = []
+    for label, stages in report["sizes"].items():
+        for stage, metrics in stages.items():
+            base = baseline.get("sizes", {}).get(label, {}).get(stage)
+            if not base:
+                continue
+            if base.get("mb_per_s") and metrics["mb_per_s"] < base["mb_per_s"] * (1 - tolerance):
+                regressions.append(f"{stage}@{label}: {metrics['mb_per_s']} MB/s vs baseline {base['mb_per_s']}")
+            if base.get("peak_rss_mb") and metrics["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(f"{stage}@{label}: peak RSS {metrics['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']}")
+    for group in ("exponents", "cases"):
+        for name, current in report.get(group, {}).items():
+            value = current["exponent"] if isinstance(current, dict) else current
+            base = baseline.get(group, {}).get(name)
+            base_value = base["exponent"] if isinstance(base, dict) else base
+            if value is not None and base_value is not None and value > base_value + slack:
+                regressions.append(f"{group}.{name}: exponent {value} vs baseline {base_value}")
+    return regressions
+
+
+def over_limit(report: dict, limit: float) -> List[str]:
+    # Tracked cases must stay close to linear even if the baseline was not.
+    return [
+        f"cases.{name}: exponent {case['exponent']} above {limit}"
+        for name, case in report.get("cases", {}).items()
+        if case["exponent"] is not None and case["exponent"] > limit
+    ]
+
+
+def run_benchmark(args: argparse.Namespace) -> int:
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    temp_dir = None
+    if args.work:
+        work = Path(args.work).resolve()
+        work.mkdir(parents=True, exist_ok=True)
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="cn2en-bench-")
+        work = Path(temp_dir)
+
+    try:
+        startup = measure_startup(work)
+        report = {
+            "host": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()},
+            "startup_seconds": startup,
+            "sizes": {},
+        }
+        for size in sizes:
+            label = format_size(size)
+            print(f"bench {label}", file=sys.stderr, flush=True)
+            report["sizes"][label] = run_size(work, size, args.seed)
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    scripts = {
+        "append_glossary": "append_glossary.py",
+        "extract": "extract_cn_blocks.py",
+        "list": "extract_blocks_from_json.py",
+        "list_terms": "extract_blocks_from_json.py",
+        "insert": "insert_en_blocks.py",
+    }
+    report["exponents"] = {
+        stage: scaling_exponent([
+            (stages[stage]["items"], stages[stage]["seconds"] - startup[script])
+            for stages in report["sizes"].values()
+        ])
+        for stage, script in scripts.items()
+    }
+    if not args.skip_cases:
+        print("bench cases", file=sys.stderr, flush=True)
+        report["cases"] = run_cases()
+
+    baseline_path = Path(args.baseline).resolve()
+    limit_regressions = over_limit(report, args.max_case_exponent)
+    if args.save_baseline and not limit_regressions:
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        report["baseline"] = f"saved {baseline_path}"
+        report["regressions"] = []
+    elif args.save_baseline:
+        report["baseline"] = f"not saved {baseline_path}"
+        report["regressions"] = limit_regressions
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        report["baseline"] = str(baseline_path)
+        report["regressions"] = limit_regressions + compare(report, baseline, args.tolerance, args.exponent_slack)
+    else:
+        report["baseline"] = None
+        report["regressions"] = limit_regressions
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.report:
+        Path(args.report).write_text(output + "\n", encoding="utf-8")
+    print(output)
+    return 1 if args.check and report["regressions"] else 0
+
+
+def main() -> int:
+    args = parse_args()
+    if args.command == "generate":
+        info = generate_markdown(Path(args.output).resolve(), parse_size(args.size), args.seed)
+        print(json.dumps({"output": str(Path(args.output).resolve()), **info}))
+        return 0
+    return run_benchmark(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
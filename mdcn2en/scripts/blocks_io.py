@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Stream block records as JSON Lines.
+
+Blocks files hold one JSON object per line (foo.en.blocks.jsonl), so every
+stage can read and write records one at a time. Legacy blocks files holding a
+single JSON array (foo.en.blocks.json) are still read, element by element,
+and files with a .json name are written back as an indented JSON array so
+older tools keep working.
+The path "-" stands for stdin or stdout so the scripts can be piped together.
+
+Usage:
+  python scripts/blocks_io.py --input path/to/foo.en.blocks.json --output path/to/foo.en.blocks.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+BLOCKS_SUFFIX = ".blocks.jsonl"
+LEGACY_BLOCKS_SUFFIX = ".blocks.json"
+STDIO = "-"
+READ_CHUNK = 1 << 16
+MANIFEST_KIND = "cn2en-batch-manifest"
+
+SKIP_RE = re.compile(r"[\s,]*")
+# Han only: it also decides which lines count as Chinese.
+CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Convert a blocks file to JSON Lines")
+    parser.add_argument("--input", required=True, help="Blocks file (JSONL or legacy JSON array), or - for stdin")
+    parser.add_argument("--output", default=STDIO, help="JSONL output path (default: stdout)")
+    return parser.parse_args()
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly one token per CJK character and per four characters otherwise.
+    cjk = len(CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def is_stdio(path) -> bool:
+    return str(path) == STDIO
+
+
+def default_blocks_path(skeleton_path: Path) -> Path:
+    return existing_blocks_path(skeleton_path.with_suffix(BLOCKS_SUFFIX))
+
+
+def is_array_path(path) -> bool:
+    # Legacy .json blocks files hold one JSON array; everything else is JSONL.
+    return not is_stdio(path) and str(path).endswith(".json")
+
+
+def existing_blocks_path(path: Path) -> Path:
+    # Falls back to a legacy .blocks.json sibling when the JSONL file is absent.
+    if path.exists() or not path.name.endswith(BLOCKS_SUFFIX):
+        return path
+    legacy = path.with_name(path.name[: -len(BLOCKS_SUFFIX)] + LEGACY_BLOCKS_SUFFIX)
+    return legacy if legacy.exists() else path
+
+
+@contextmanager
+def open_input(path) -> Iterator[TextIO]:
+    if is_stdio(path):
+        yield sys.stdin
+        return
+    with Path(path).open("r", encoding="utf-8") as f:
+        yield f
+
+
+@contextmanager
+def open_output(path) -> Iterator[TextIO]:
+    if is_stdio(path):
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    with Path(path).open("w", encoding="utf-8") as f:
+        yield f
+
+
+def iter_records(f: TextIO) -> Iterator[dict]:
+    # Decodes whitespace-separated JSON objects (JSONL, or one pretty-printed
+    # object); a leading "[" streams the elements of a legacy array instead.
+    decoder = json.JSONDecoder()
+    buffer, pos = "", 0
+    in_array = started = False
+    while True:
+        pos = SKIP_RE.match(buffer, pos).end()
+        if pos == len(buffer):
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                if in_array:
+                    raise ValueError("Unterminated JSON array in blocks file")
+                return
+            buffer, pos = chunk, 0
+            continue
+        if not started:
+            started = True
+            if buffer[pos] == "[":
+                in_array = True
+                pos += 1
+                continue
+        if in_array and buffer[pos] == "]":
+            in_array = False
+            pos += 1
+            continue
+        try:
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Incomplete record; read ahead at least as much as is buffered.
+            chunk = f.read(max(READ_CHUNK, len(buffer) - pos))
+            if not chunk:
+                raise
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        if not isinstance(record, dict):
+            raise ValueError(f"Expected a JSON object per record, got {type(record).__name__}")
+        yield record
+        pos = end
+
+
+def read_blocks(path) -> Iterator[dict]:
+    if not is_stdio(path) and not Path(path).exists():
+        return
+    with open_input(path) as f:
+        yield from iter_records(f)
+
+
+def write_record(f: TextIO, record: dict) -> None:
+    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+@contextmanager
+def record_writer(path, array: Optional[bool] = None) -> Iterator[Callable[[dict], None]]:
+    # Yields an emit(record) function; array defaults to the format of path.
+    with open_output(path) as f:
+        if not (is_array_path(path) if array is None else array):
+            yield lambda record: write_record(f, record)
+            return
+        first = True
+
+        def emit(record: dict) -> None:
+            # Same layout as json.dumps(records, indent=2), one element at a time.
+            nonlocal first
+            f.write("[\n" if first else ",\n")
+            first = False
+            f.write("  " + json.dumps(record, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+
+        yield emit
+        f.write("[]\n" if first else "\n]\n")
+
+
+def write_blocks(path, records: Iterable[dict]) -> int:
+    # Files are replaced atomically, so records may be read from the same path.
+    count = 0
+    target = path if is_stdio(path) else Path(path).with_name(Path(path).name + ".tmp")
+    with record_writer(target, array=is_array_path(path)) as emit:
+        for record in records:
+            emit(record)
+            count += 1
+    if not is_stdio(path):
+        target.replace(path)
+    return count
+
+
+def main() -> int:
+    args = parse_args()
+    if not is_stdio(args.input) and not Path(args.input).exists():
+        raise SystemExit(f"Input not found: {args.input}")
+    count = write_blocks(args.output, read_blocks(args.input))
+    print(json.dumps({"output": args.output, "count": count}), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""In-process API for mdcn2en round trips on strings and streams.
+
+The command-line scripts wrap the same functions around files; a service
+translating many documents can import this module instead of spawning them
+and round-tripping through .en.md, blocks and translations files.
+
+Usage:
+  import sys; sys.path.insert(0, "mdcn2en/scripts")
+  from cn2en_api import extract_markdown, insert_markdown, list_pending, load_glossary
+
+  skeleton, blocks, stats = extract_markdown(markdown)
+  pending = list_pending(blocks, matcher=load_glossary())
+  translations = {item["placeholder"]: translate(item["text"], item["terms"]) for item in pending}
+  english, summary, applied = insert_markdown(skeleton, translations, blocks)
+
+Blocks are plain dicts as written to foo.en.blocks.jsonl. insert_markdown
+records applied translations in them, so they can be kept as the previous
+blocks for a later extract_markdown(..., previous=blocks) update. Errors are
+raised as ValueError rather than SystemExit.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from append_glossary import normalize_entries
+from extract_blocks_from_json import iter_pending
+from extract_cn_blocks import extract, strip_newlines
+from glossary_matcher import GlossaryMatcher
+from glossary_store import DEFAULT_GLOSSARY_PATH, GlossaryStore
+from insert_en_blocks import insert_blocks, merge_translations, record_applied, translations_from_records
+from translation_memory import TranslationMemory
+
+Translations = Union[Dict[str, str], Iterable[dict]]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Round-trip a Markdown file through the in-process API")
+    parser.add_argument("--input", required=True, help="Path to Chinese Markdown file")
+    parser.add_argument("--glossary", default=str(DEFAULT_GLOSSARY_PATH), help="Path to glossary.jsonl")
+    return parser.parse_args()
+
+
+def extract_stream(
+    src: TextIO,
+    out: TextIO,
+    memory: Optional[TranslationMemory] = None,
+    mask: bool = True,
+    previous: Optional[Iterable[dict]] = None,
+) -> Tuple[List[dict], Dict[str, int]]:
+    blocks: List[dict] = []
+    stats = extract(strip_newlines(src), out, blocks.append, memory, mask=mask, previous=previous)
+    return blocks, stats
+
+
+def extract_markdown(
+    markdown: str,
+    memory: Optional[TranslationMemory] = None,
+    mask: bool = True,
+    previous: Optional[Iterable[dict]] = None,
+) -> Tuple[str, List[dict], Dict[str, int]]:
+    # newline=None translates \r\n like reading the file in text mode does.
+    out = io.StringIO()
+    blocks, stats = extract_stream(io.StringIO(markdown, newline=None), out, memory, mask=mask, previous=previous)
+    return out.getvalue(), blocks, stats
+
+
+def list_pending(
+    blocks: Iterable[dict],
+    include_all: bool = False,
+    matcher: Optional[GlossaryMatcher] = None,
+) -> List[dict]:
+    return list(iter_pending(blocks, include_all, matcher))
+
+
+def insert_stream(
+    src: TextIO,
+    out: TextIO,
+    translations: Translations,
+    blocks: Iterable[dict] = (),
+    allow_dropped: bool = False,
+) -> Tuple[dict, List[Tuple[str, str]]]:
+    translations = _as_mapping(translations)
+    blocks = list(blocks)
+    merged, dropped = merge_translations(translations, blocks, allow_dropped)
+    used, missing = insert_blocks(src, merged, out)
+    unused = [p for p in translations if p not in used and p not in dropped]
+    if unused:
+        raise ValueError("Some placeholders not found in input: " + ", ".join(unused[:5]))
+    applied: List[Tuple[str, str]] = []
+    for _ in record_applied(blocks, translations, used, applied, dropped):
+        pass
+    summary = {"count": len(translations), "missing": missing, "dropped_masks": dropped}
+    return summary, applied
+
+
+def insert_markdown(
+    skeleton: str,
+    translations: Translations,
+    blocks: Iterable[dict] = (),
+    allow_dropped: bool = False,
+) -> Tuple[str, dict, List[Tuple[str, str]]]:
+    # Nothing is written anywhere if a translation has no placeholder.
+    out = io.StringIO(newline="")
+    summary, applied = insert_stream(io.StringIO(skeleton, newline=""), out, translations, blocks, allow_dropped)
+    return out.getvalue(), summary, applied
+
+
+def load_glossary(path: Path = DEFAULT_GLOSSARY_PATH) -> GlossaryMatcher:
+    return GlossaryMatcher.load(Path(path))
+
+
+def apply_glossary(text: str, matcher: GlossaryMatcher) -> Dict[str, str]:
+    return matcher.annotate(text)
+
+
+def append_glossary(
+    entries: Union[Dict[str, str], List[dict]],
+    source: Optional[str] = None,
+    context: Optional[str] = None,
+    path: Path = DEFAULT_GLOSSARY_PATH,
+) -> List[dict]:
+    try:
+        normalized = normalize_entries(entries, source, context)
+    except SystemExit as exc:
+        raise ValueError(str(exc)) from None
+    return GlossaryStore(Path(path)).append(normalized)
+
+
+def _as_mapping(translations: Translations) -> Dict[str, str]:
+    if isinstance(translations, dict):
+        return translations
+    try:
+        return translations_from_records(translations)
+    except SystemExit as exc:
+        raise ValueError(str(exc)) from None
+
+
+def main() -> int:
+    # Round trip with the Chinese text as its own "translation", as a smoke test.
+    args = parse_args()
+    input_path = Path(args.input).resolve()
+    if not input_path.exists():
+        raise SystemExit(f"Input not found: {input_path}")
+
+    skeleton, blocks, stats = extract_markdown(input_path.read_text(encoding="utf-8"))
+    pending = list_pending(blocks, matcher=load_glossary(Path(args.glossary).resolve()))
+    markdown, summary, _ = insert_markdown(skeleton, {item["placeholder"]: item["text"] for item in pending}, blocks)
+    identical = markdown == input_path.read_text(encoding="utf-8")
+    terms = sum(len(item["terms"]) for item in pending)
+    print(json.dumps({"blocks": stats["count"], "terms": terms, "missing": len(summary["missing"]), "identical": identical}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Run mdcn2en over a directory tree of Markdown files.
+
+Usage:
+  python scripts/corpus.py extract --root docs --work .cn2en [--include "*.md"] [--exclude "*.en.md"] [--jobs N]
+  # translate every work/batches/batch-NNNN.json into batch-NNNN.en.json
+  python scripts/corpus.py insert --root docs --work .cn2en [--jobs N]
+
+extract runs extract_cn_blocks.py logic for every matching file on a process
+pool (in --update mode when a blocks file already exists), then collects the
+pending blocks of all files into one queue deduplicated by block text. Exact
+matches from the translation memory are filled in; the rest is packed into
+token-bounded batch files with a manifest.
+
+insert loads the translated batches and fills the placeholders of every file
+in parallel, then records the new translations in the translation memory.
+
+Both commands keep per-file state in the work directory and skip files that
+are already done, so an interrupted run can be resumed. Progress goes to
+stderr and a JSON summary report is printed and saved as report.json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from blocks_io import BLOCKS_SUFFIX, existing_blocks_path, read_blocks
+from extract_blocks_from_json import DEFAULT_BATCH_TOKENS, write_batches
+from extract_cn_blocks import compute_output_path, extract_file
+from inline_mask import lost_sentinels
+from insert_en_blocks import insert_file, load_translations
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Translate a tree of Chinese Markdown files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("extract", "insert"):
+        cmd = sub.add_parser(name)
+        cmd.add_argument("--root", required=True, help="Root directory of Markdown files")
+        cmd.add_argument("--work", required=True, help="Work directory for state, queue and batches")
+        cmd.add_argument("--include", action="append", help="Glob of files to include (default: *.md)")
+        cmd.add_argument("--exclude", action="append", help="Glob of files to exclude (default: *.en.md)")
+        cmd.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+        cmd.add_argument("--memory", default=str(DEFAULT_MEMORY_PATH), help="Path to translation memory database")
+        cmd.add_argument("--no-memory", action="store_true", help="Do not use the translation memory")
+    extract = sub.choices["extract"]
+    extract.add_argument("--no-mask", action="store_true", help="Send inline code, URLs and tags as-is")
+    extract.add_argument("--batch-tokens", type=int, default=DEFAULT_BATCH_TOKENS, help="Estimated token budget per batch")
+    return parser.parse_args()
+
+
+def find_sources(root: Path, work: Path, include: List[str], exclude: List[str]) -> List[Path]:
+    sources: List[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if Path(dirpath, d).resolve() != work)
+        for filename in sorted(filenames):
+            rel = Path(dirpath, filename).relative_to(root).as_posix()
+            if not any(fnmatch.fnmatch(rel, pat) for pat in include):
+                continue
+            if any(fnmatch.fnmatch(rel, pat) for pat in exclude):
+                continue
+            sources.append(Path(dirpath, filename))
+    return sources
+
+
+def load_json(path: Path, default):
+    if not path.exists():
+        return default
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_json(path: Path, data) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def progress(done: int, total: int, message: str) -> None:
+    print(f"[{done}/{total}] {message}", file=sys.stderr, flush=True)
+
+
+def _extract_one(source: str, mask: bool) -> dict:
+    input_path = Path(source)
+    output_path = compute_output_path(input_path)
+    blocks_path = output_path.with_suffix(BLOCKS_SUFFIX)
+    update = existing_blocks_path(blocks_path).exists()
+    stats = extract_file(input_path, output_path, blocks_path, mask=mask, update=update)
+    return {"output": str(output_path), "blocks": str(blocks_path), **stats}
+
+
+def _insert_one(output: str, blocks: str, translations: Dict[str, str]) -> dict:
+    summary, applied = insert_file(Path(output), translations, Path(blocks), Path(output))
+    summary["applied"] = applied
+    return summary
+
+
+def harvest_batches(work: Path, queue: List[dict]) -> int:
+    # Pull finished batch translations into the queue so batches can be rebuilt.
+    manifest_path = work / "batches" / "manifest.json"
+    if not manifest_path.exists():
+        return 0
+    by_id = {entry["id"]: entry for entry in queue}
+    harvested = 0
+    for batch in load_json(manifest_path, {}).get("batches", []):
+        output = manifest_path.parent / batch["output"]
+        if not output.exists():
+            continue
+        for placeholder, text in load_translations(output).items():
+            entry = by_id.get(int(placeholder.strip("[]").rsplit("_", 1)[1]))
+            if entry is not None and "translation" not in entry and not lost_sentinels(entry["text"], text):
+                entry["translation"] = text
+                harvested += 1
+    return harvested
+
+
+def run_extract(args: argparse.Namespace, root: Path, work: Path, sources: List[Path]) -> dict:
+    state = load_json(work / "state.json", {"files": {}})
+    files = state["files"]
+    todo = []
+    for source in sources:
+        rel = source.relative_to(root).as_posix()
+        stat = source.stat()
+        entry = files.get(rel)
+        if entry and entry.get("extracted") and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            continue
+        files[rel] = {"source": str(source), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "extracted": False, "inserted": False}
+        todo.append(rel)
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {pool.submit(_extract_one, files[rel]["source"], not args.no_mask): rel for rel in todo}
+        for done, future in enumerate(as_completed(futures), start=1):
+            rel = futures[future]
+            try:
+                result = future.result()
+            except (Exception, SystemExit) as exc:
+                files[rel]["error"] = str(exc)
+                failed += 1
+                progress(done, len(todo), f"extract failed {rel}: {exc}")
+                continue
+            files[rel].update(output=result["output"], blocks=result["blocks"], extracted=True, count=result["count"])
+            files[rel].pop("error", None)
+            progress(done, len(todo), f"extract {rel} ({result['count']} blocks)")
+            if done % 50 == 0:
+                save_json(work / "state.json", state)
+    save_json(work / "state.json", state)
+
+    queue: List[dict] = load_json(work / "queue.json", [])
+    harvested = harvest_batches(work, queue)
+    by_text = {entry["text"]: entry for entry in queue}
+    next_id = max((entry["id"] for entry in queue), default=0)
+    selected = {s.relative_to(root).as_posix() for s in sources}
+    referenced = set()
+    pending_refs = 0
+    for rel, entry in files.items():
+        if not entry.get("extracted") or rel not in selected:
+            continue
+        for b in read_blocks(Path(entry["blocks"])):
+            if "translation" in b:
+                continue
+            pending_refs += 1
+            referenced.add(b["text"])
+            if b["text"] not in by_text:
+                next_id += 1
+                by_text[b["text"]] = {"id": next_id, "text": b["text"]}
+    # Translated entries stay as a cache; untranslated ones only while referenced.
+    queue = sorted(
+        (e for e in by_text.values() if "translation" in e or e["text"] in referenced),
+        key=lambda e: e["id"],
+    )
+
+    prefilled = 0
+    if not args.no_memory:
+        with TranslationMemory(Path(args.memory).resolve()) as memory:
+            for entry in queue:
+                if "translation" not in entry:
+                    translation = memory.lookup(entry["text"])
+                    if translation is not None:
+                        entry["translation"] = translation
+                        prefilled += 1
+    save_json(work / "queue.json", queue)
+
+    batch_dir = work / "batches"
+    if batch_dir.exists():
+        for old in batch_dir.glob("batch-*.json"):
+            old.unlink()
+    untranslated = [{"index": e["id"], "text": e["text"]} for e in queue if "translation" not in e]
+    manifest = write_batches(untranslated, batch_dir, args.batch_tokens, work / "queue.json")
+
+    return {
+        "command": "extract",
+        "files": len(sources),
+        "extracted": len(todo) - failed,
+        "skipped": len(sources) - len(todo),
+        "failed": failed,
+        "pending_blocks": pending_refs,
+        "unique_blocks": len(untranslated),
+        "prefilled": prefilled,
+        "harvested": harvested,
+        "batches": len(manifest["batches"]),
+        "manifest": str(batch_dir / "manifest.json"),
+    }
+
+
+def run_insert(args: argparse.Namespace, root: Path, work: Path, sources: List[Path]) -> dict:
+    state = load_json(work / "state.json", {"files": {}})
+    files = state["files"]
+    queue: List[dict] = load_json(work / "queue.json", [])
+    harvest_batches(work, queue)
+    save_json(work / "queue.json", queue)
+    en_by_text = {e["text"]: e["translation"] for e in queue if "translation" in e}
+
+    selected = {s.relative_to(root).as_posix() for s in sources}
+    jobs = {}
+    for rel, entry in files.items():
+        if rel not in selected or not entry.get("extracted") or entry.get("inserted"):
+            continue
+        translations = {}
+        for b in read_blocks(Path(entry["blocks"])):
+            if "translation" not in b and b["text"] in en_by_text:
+                translations[b["placeholder"]] = en_by_text[b["text"]]
+        jobs[rel] = translations
+
+    failed = 0
+    incomplete = 0
+    applied_total = 0
+    memory: Optional[TranslationMemory] = None if args.no_memory else TranslationMemory(Path(args.memory).resolve())
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {
+            pool.submit(_insert_one, files[rel]["output"], files[rel]["blocks"], translations): rel
+            for rel, translations in jobs.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            rel = futures[future]
+            try:
+                result = future.result()
+            except (Exception, SystemExit) as exc:
+                files[rel]["error"] = str(exc)
+                failed += 1
+                progress(done, len(futures), f"insert failed {rel}: {exc}")
+                continue
+            applied_total += len(result["applied"])
+            if memory:
+                for zh, en in result["applied"]:
+                    memory.record(zh, en)
+            files[rel]["inserted"] = not result["missing"]
+            files[rel].pop("error", None)
+            if result["missing"]:
+                incomplete += 1
+            progress(done, len(futures), f"insert {rel} ({len(result['applied'])} blocks, {len(result['missing'])} missing)")
+            if done % 50 == 0:
+                save_json(work / "state.json", state)
+    save_json(work / "state.json", state)
+
+    report = {
+        "command": "insert",
+        "files": len(jobs),
+        "completed": len(jobs) - failed - incomplete,
+        "incomplete": incomplete,
+        "failed": failed,
+        "applied_blocks": applied_total,
+    }
+    if memory:
+        report["memory"] = memory.stats()
+        memory.close()
+    return report
+
+
+def main() -> int:
+    args = parse_args()
+    root = Path(args.root).resolve()
+    if not root.is_dir():
+        raise SystemExit(f"Root directory not found: {root}")
+    work = Path(args.work).resolve()
+    work.mkdir(parents=True, exist_ok=True)
+
+    sources = find_sources(root, work, args.include or ["*.md"], args.exclude or ["*.en.md"])
+    if args.command == "extract":
+        report = run_extract(args, root, work, sources)
+    else:
+        report = run_insert(args, root, work, sources)
+
+    save_json(work / "report.json", report)
+    print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
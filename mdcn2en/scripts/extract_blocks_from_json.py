@@ -1,11 +1,23 @@
 #!/usr/bin/env python3
-"""Extract block texts from a blocks JSON file.
+"""Extract block texts from a blocks file.
 
 Usage:
-  python scripts/extract_blocks_from_json.py --input path/to/foo.en.blocks.json
+  python scripts/extract_blocks_from_json.py --input path/to/foo.en.blocks.jsonl
+  python scripts/extract_cn_blocks.py --input foo.md --blocks - | python scripts/extract_blocks_from_json.py --input - --jsonl
 
 Outputs:
+  - Blocks are read one record at a time from JSONL or a legacy JSON array;
+    --input - reads them from stdin.
   - Prints lines like "0001\t<text>" to stdout by default.
+  - With --jsonl, prints one {"index", "placeholder", "text"} object per line
+    instead, ready to be translated and piped into insert_en_blocks.py.
+  - Blocks pre-filled from the translation memory are skipped unless --all is given.
+  - With --terms, a third column lists glossary terms found in the block,
+    e.g. "0001\t<text>\t科研技能=research skills; 技能=Skill".
+  - With --batch-dir, blocks are packed in document order into batch files
+    (batch-0001.json, ...) of at most --batch-tokens estimated tokens, plus a
+    manifest.json that insert_en_blocks.py accepts as --translations once each
+    batch has a translated batch-NNNN.en.json next to it.
 """
 
 from __future__ import annotations
@@ -13,33 +25,95 @@ from __future__ import annotations
 import argparse
 import json
 from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from blocks_io import MANIFEST_KIND, estimate_tokens, is_stdio, open_output, read_blocks, write_record
+from glossary_matcher import GlossaryMatcher
+from glossary_store import DEFAULT_GLOSSARY_PATH
+
+DEFAULT_BATCH_TOKENS = 1500
 
 
 def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Extract block texts from blocks JSON")
-    parser.add_argument("--input", required=True, help="Path to blocks JSON file")
-    parser.add_argument("--output", help="Optional output text file")
+    parser = argparse.ArgumentParser(description="Extract block texts from a blocks file")
+    parser.add_argument("--input", required=True, help="Path to blocks file, or - for stdin")
+    parser.add_argument("--output", default="-", help="Optional output file (default: stdout)")
+    parser.add_argument("--jsonl", action="store_true", help="Print JSONL records instead of tab-separated lines")
+    parser.add_argument("--all", action="store_true", help="Include blocks already translated from memory")
+    parser.add_argument("--terms", action="store_true", help="Annotate each block with matched glossary terms")
+    parser.add_argument("--glossary", default=str(DEFAULT_GLOSSARY_PATH), help="Path to glossary.jsonl")
+    parser.add_argument("--batch-dir", help="Write token-bounded batch files and a manifest to this directory")
+    parser.add_argument("--batch-tokens", type=int, default=DEFAULT_BATCH_TOKENS, help="Estimated token budget per batch")
     return parser.parse_args()
 
 
+def pack_batches(blocks: Iterable[dict], budget: int) -> Iterator[List[dict]]:
+    # Packs in stream order: after --update, index no longer follows the document.
+    current: List[dict] = []
+    used = 0
+    for b in blocks:
+        tokens = estimate_tokens(b.get("text", ""))
+        if current and used + tokens > budget:
+            yield current
+            current, used = [], 0
+        current.append(b)
+        used += tokens
+    if current:
+        yield current
+
+
+def write_batches(blocks: Iterable[dict], batch_dir: Path, budget: int, source: Path) -> dict:
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for number, batch in enumerate(pack_batches(blocks, budget), start=1):
+        name = f"batch-{number:04d}.json"
+        (batch_dir / name).write_text(json.dumps(batch, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        entries.append({
+            "file": name,
+            "output": f"batch-{number:04d}.en.json",
+            "indices": [int(b["index"]) for b in batch],
+            "tokens": sum(estimate_tokens(b.get("text", "")) for b in batch),
+        })
+    manifest = {"kind": MANIFEST_KIND, "blocks": str(source), "batches": entries}
+    (batch_dir / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return manifest
+
+
+def iter_pending(blocks: Iterable[dict], include_all: bool, matcher=None) -> Iterator[dict]:
+    for b in blocks:
+        if not include_all and "translation" in b:
+            continue
+        item = {"index": int(b.get("index", 0)), "placeholder": b.get("placeholder"), "text": b.get("text", "")}
+        if matcher:
+            item["terms"] = matcher.annotate(item["text"])
+        yield item
+
+
 def main() -> int:
     args = parse_args()
-    input_path = Path(args.input).resolve()
-    if not input_path.exists():
+    input_path = Path(args.input) if is_stdio(args.input) else Path(args.input).resolve()
+    if not is_stdio(input_path) and not input_path.exists():
         raise SystemExit(f"Input not found: {input_path}")
 
-    blocks = json.loads(input_path.read_text(encoding="utf-8"))
-    lines = []
-    for b in blocks:
-        index = int(b.get("index", 0))
-        text = b.get("text", "")
-        lines.append(f"{index:04d}\t{text}")
-
-    output = "\n".join(lines) + ("\n" if lines else "")
-    if args.output:
-        Path(args.output).write_text(output, encoding="utf-8")
-    else:
-        print(output, end="")
+    matcher = GlossaryMatcher.load(Path(args.glossary).resolve()) if args.terms else None
+    pending = iter_pending(read_blocks(input_path), args.all, matcher)
+
+    if args.batch_dir:
+        batch_dir = Path(args.batch_dir).resolve()
+        manifest = write_batches(pending, batch_dir, args.batch_tokens, input_path)
+        count = sum(len(entry["indices"]) for entry in manifest["batches"])
+        print(json.dumps({"manifest": str(batch_dir / "manifest.json"), "batches": len(manifest["batches"]), "blocks": count}))
+        return 0
+
+    with open_output(args.output) as out:
+        for item in pending:
+            if args.jsonl:
+                write_record(out, item)
+            elif matcher:
+                terms = "; ".join(f"{zh}={en}" for zh, en in item["terms"].items())
+                out.write(f"{item['index']:04d}\t{item['text']}\t{terms}\n")
+            else:
+                out.write(f"{item['index']:04d}\t{item['text']}\n")
     return 0
 
 
@@ -8,7 +8,21 @@ Usage:
 
 Outputs:
   - Sibling file: foo.en.md (or foo.zh.md -> foo.en.md)
-  - Blocks file: foo.en.blocks.json
+  - Blocks file: foo.en.blocks.jsonl, one JSON object per line (--blocks - writes
+    it to stdout and the summary to stderr)
+
+Blocks already in the translation memory carry a "translation" field and do
+not need to be sent for translation again (disable with --no-memory).
+
+Inline code, link/image targets, URLs, HTML tags and emphasis markers are
+masked with sentinels like ⟦1⟧; the originals are kept in the block's "masks"
+field and restored by insert_en_blocks.py (disable with --no-mask).
+
+With --update, the previous blocks file is diffed against the edited source:
+blocks whose text is unchanged keep their index, even when they moved, and
+any English recorded for them is written straight into the regenerated .en.md.
+Only changed or new blocks keep placeholders, numbered after the previous
+highest index. A legacy foo.en.blocks.json array is read and replaced.
 """
 
 from __future__ import annotations
@@ -16,18 +30,25 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
+from collections import deque
 from pathlib import Path
-from shutil import copyfile
-from typing import Tuple
+from typing import Callable, Deque, Dict, Iterable, Iterator, Optional, TextIO, Tuple
 
-CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+from blocks_io import BLOCKS_SUFFIX, CJK_RE, existing_blocks_path, is_array_path, is_stdio, read_blocks, record_writer
+from inline_mask import lost_sentinels, mask_inline, unmask_inline
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Extract Chinese blocks from Markdown")
     parser.add_argument("--input", required=True, help="Path to Chinese Markdown file")
-    parser.add_argument("--blocks", help="Optional path to blocks json output")
+    parser.add_argument("--blocks", help="Optional path to blocks jsonl output, or - for stdout")
     parser.add_argument("--output", help="Optional path to skeleton .en.md output")
+    parser.add_argument("--memory", default=str(DEFAULT_MEMORY_PATH), help="Path to translation memory database")
+    parser.add_argument("--no-memory", action="store_true", help="Do not pre-fill blocks from translation memory")
+    parser.add_argument("--no-mask", action="store_true", help="Send inline code, URLs and tags as-is")
+    parser.add_argument("--update", action="store_true", help="Reuse unchanged blocks from the previous blocks file")
     return parser.parse_args()
 
 
@@ -40,36 +61,64 @@ def compute_output_path(input_path: Path) -> Path:
     return input_path.with_name(name + ".en.md")
 
 
-def split_prefix(line: str) -> Tuple[str, str]:
-    # Preserve common markdown prefixes so structure remains intact.
-    patterns = [
-        r"^(\s*#{1,6}\s+)(.*)$",  # headings
-        r"^(\s*[-*+]\s+\[[ xX]\]\s+)(.*)$",  # task list
-        r"^(\s*(?:[-*+]|\d+\.)\s+)(.*)$",  # list items
-        r"^(\s*(?:>\s+)+)(.*)$",  # blockquote
-    ]
-    for pat in patterns:
-        m = re.match(pat, line)
-        if m:
-            return m.group(1), m.group(2)
-    return "", line
-
-
-def main() -> int:
-    args = parse_args()
-    input_path = Path(args.input).resolve()
-    if not input_path.exists():
-        raise SystemExit(f"Input not found: {input_path}")
+# Preserve common markdown prefixes so structure remains intact. Alternatives
+# are tried in order, so headings win over task lists, lists and blockquotes.
+PREFIX_RE = re.compile(
+    r"^("
+    r"\s*#{1,6}\s+"  # headings
+    r"|\s*[-*+]\s+\[[ xX]\]\s+"  # task list
+    r"|\s*(?:[-*+]|\d+\.)\s+"  # list items
+    r"|\s*(?:>\s+)+"  # blockquote
+    r")(.*)$"
+)
 
-    output_path = Path(args.output).resolve() if args.output else compute_output_path(input_path)
-    blocks_path = Path(args.blocks).resolve() if args.blocks else output_path.with_suffix(".blocks.json")
 
-    copyfile(input_path, output_path)
+def split_prefix(line: str) -> Tuple[str, str]:
+    m = PREFIX_RE.match(line)
+    if m:
+        return m.group(1), m.group(2)
+    return "", line
 
-    lines = output_path.read_text(encoding="utf-8").splitlines()
 
-    blocks = []
-    out_lines = []
+def iter_lines(path: Path) -> Iterator[str]:
+    with path.open("r", encoding="utf-8") as f:
+        yield from strip_newlines(f)
+
+
+def strip_newlines(f: Iterable[str]) -> Iterator[str]:
+    # Yields the lines str.splitlines() gives for the whole text, so \u2028,
+    # \x1c and the other separators still break lines; empty input is one line.
+    empty = True
+    for line in f:
+        empty = False
+        yield from line.splitlines()
+    if empty:
+        yield ""
+
+
+def index_previous(blocks: Iterable[dict]) -> Tuple[Dict[str, Deque[dict]], int]:
+    # Returns the previous blocks grouped by text and the highest index seen.
+    by_text: Dict[str, Deque[dict]] = {}
+    highest = 0
+    for b in blocks:
+        by_text.setdefault(b["text"], deque()).append(b)
+        highest = max(highest, int(b["index"]))
+    return by_text, highest
+
+
+def extract(
+    lines: Iterable[str],
+    out: TextIO,
+    emit: Callable[[dict], None],
+    memory: Optional[TranslationMemory] = None,
+    mask: bool = True,
+    previous: Optional[Iterable[dict]] = None,
+) -> Dict[str, int]:
+    stats = {"count": 0, "prefilled": 0, "source_chars": 0, "masked_chars": 0}
+    count = 0
+    previous_by_text, next_index = index_previous(previous or [])
+    if previous is not None:
+        stats.update({"reused": 0, "new": 0, "removed": 0})
     in_front_matter = False
     in_fenced_code = False
 
@@ -78,39 +127,116 @@ def main() -> int:
 
         if idx == 1 and stripped == "---":
             in_front_matter = True
-            out_lines.append(line)
+            out.write(line + "\n")
             continue
         if in_front_matter:
-            out_lines.append(line)
+            out.write(line + "\n")
             if stripped == "---":
                 in_front_matter = False
             continue
 
         if stripped.startswith("```") or stripped.startswith("~~~"):
             in_fenced_code = not in_fenced_code
-            out_lines.append(line)
+            out.write(line + "\n")
             continue
-        if in_fenced_code:
-            out_lines.append(line)
+        if in_fenced_code or not CJK_RE.search(line):
+            out.write(line + "\n")
             continue
 
         prefix, remainder = split_prefix(line)
-        if CJK_RE.search(remainder or ""):
-            block_index = len(blocks) + 1
-            placeholder = f"[[CN2EN_BLOCK_{block_index:04d}]]"
-            blocks.append({
-                "index": block_index,
+        text, masks = mask_inline(remainder) if mask else (remainder, {})
+        if CJK_RE.search(text):
+            count += 1
+            candidates = previous_by_text.get(text)
+            earlier = candidates.popleft() if candidates else None
+            if earlier is not None:
+                index = int(earlier["index"])
+            else:
+                next_index += 1
+                index = next_index
+            placeholder = f"[[CN2EN_BLOCK_{index:04d}]]"
+            block = {
+                "index": index,
                 "placeholder": placeholder,
-                "text": remainder,
-            })
-            out_lines.append(prefix + placeholder)
+                "text": text,
+            }
+            if masks:
+                block["masks"] = masks
+            stats["source_chars"] += len(remainder)
+            stats["masked_chars"] += len(text)
+            translation = earlier.get("translation") if earlier else None
+            if translation is not None and lost_sentinels(text, translation):
+                translation = None
+            reused = translation is not None
+            if previous is not None:
+                stats["reused" if reused else "new"] += 1
+            if translation is None and memory:
+                translation = memory.lookup(text)
+                if translation is not None:
+                    stats["prefilled"] += 1
+            if translation is not None:
+                block["translation"] = translation
+            emit(block)
+            if reused:
+                out.write(prefix + unmask_inline(translation, masks)[0] + "\n")
+            else:
+                out.write(prefix + placeholder + "\n")
         else:
-            out_lines.append(line)
+            out.write(line + "\n")
+
+    stats["count"] = count
+    if previous is not None:
+        stats["removed"] = sum(len(rest) for rest in previous_by_text.values())
+    return stats
+
+
+def extract_file(
+    input_path: Path,
+    output_path: Path,
+    blocks_path: Path,
+    memory: Optional[TranslationMemory] = None,
+    mask: bool = True,
+    update: bool = False,
+) -> Dict[str, int]:
+    previous = None
+    previous_path = existing_blocks_path(blocks_path) if not is_stdio(blocks_path) else None
+    if update:
+        if previous_path is None:
+            raise SystemExit("--update needs a blocks file, not stdout")
+        previous = read_blocks(previous_path)
+
+    tmp_output = output_path.with_name(output_path.name + ".tmp")
+    tmp_blocks = blocks_path if previous_path is None else blocks_path.with_name(blocks_path.name + ".tmp")
+    with tmp_output.open("w", encoding="utf-8") as out, record_writer(tmp_blocks, is_array_path(blocks_path)) as emit:
+        stats = extract(iter_lines(input_path), out, emit, memory, mask=mask, previous=previous)
+    tmp_output.replace(output_path)
+    if previous_path is not None:
+        tmp_blocks.replace(blocks_path)
+        if update and previous_path != blocks_path and previous_path.exists():
+            previous_path.unlink()
+    return stats
 
-    output_path.write_text("\n".join(out_lines) + "\n", encoding="utf-8")
-    blocks_path.write_text(json.dumps(blocks, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
 
-    print(json.dumps({"output": str(output_path), "blocks": str(blocks_path), "count": len(blocks)}))
+def main() -> int:
+    args = parse_args()
+    input_path = Path(args.input).resolve()
+    if not input_path.exists():
+        raise SystemExit(f"Input not found: {input_path}")
+
+    output_path = Path(args.output).resolve() if args.output else compute_output_path(input_path)
+    if args.blocks:
+        blocks_path = Path(args.blocks) if is_stdio(args.blocks) else Path(args.blocks).resolve()
+    else:
+        blocks_path = output_path.with_suffix(BLOCKS_SUFFIX)
+
+    memory = None if args.no_memory else TranslationMemory(Path(args.memory).resolve())
+    stats = extract_file(input_path, output_path, blocks_path, memory, mask=not args.no_mask, update=args.update)
+
+    summary = {"output": str(output_path), "blocks": str(blocks_path), **stats}
+    if memory:
+        summary["memory"] = memory.stats()
+        memory.close()
+    print(json.dumps(summary), file=sys.stderr if is_stdio(blocks_path) else sys.stdout)
     return 0
 
 
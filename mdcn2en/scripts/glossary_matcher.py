@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Find glossary terms inside block texts with an Aho-Corasick automaton.
+
+The automaton is built once from references/glossary.jsonl (latest entry per
+zh term) and cached next to it; it is rebuilt only when the glossary file
+changes. Overlapping terms resolve leftmost-longest, so 科研技能 wins over 科研.
+
+Usage:
+  python scripts/glossary_matcher.py --text "提升科研技能"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from glossary_store import DEFAULT_GLOSSARY_PATH, GlossaryStore
+
+CACHE_VERSION = 1
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Match glossary terms in text")
+    parser.add_argument("--glossary", default=str(DEFAULT_GLOSSARY_PATH), help="Path to glossary.jsonl")
+    parser.add_argument("--text", required=True, help="Text to annotate")
+    return parser.parse_args()
+
+
+class GlossaryMatcher:
+    def __init__(self, terms: Dict[str, str]) -> None:
+        self.terms = terms
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.lengths: List[List[int]] = [[]]
+        for term in terms:
+            if term:
+                self._add(term)
+        self._link()
+
+    @classmethod
+    def load(cls, glossary_path: Path = DEFAULT_GLOSSARY_PATH) -> "GlossaryMatcher":
+        glossary_path = Path(glossary_path)
+        cache_path = glossary_path.with_suffix(".automaton.pickle")
+        fingerprint = _fingerprint(glossary_path)
+        if cache_path.exists():
+            try:
+                with cache_path.open("rb") as f:
+                    version, cached_fingerprint, tables = pickle.load(f)
+                if version == CACHE_VERSION and cached_fingerprint == fingerprint:
+                    matcher = cls.__new__(cls)
+                    matcher.terms, matcher.goto, matcher.fail, matcher.lengths = tables
+                    return matcher
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                pass
+        store = GlossaryStore(glossary_path)
+        matcher = cls({zh: entry["en"] for zh, entry in store.entries.items()})
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            tables = (matcher.terms, matcher.goto, matcher.fail, matcher.lengths)
+            pickle.dump((CACHE_VERSION, fingerprint, tables), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(cache_path)
+        return matcher
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        # Collect every match, then keep leftmost-longest non-overlapping spans.
+        matches: List[Tuple[int, int]] = []
+        node = 0
+        for end, ch in enumerate(text, start=1):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for length in self.lengths[node]:
+                matches.append((end - length, end))
+        matches.sort(key=lambda span: (span[0], span[0] - span[1]))
+        selected: List[Tuple[int, int, str]] = []
+        last_end = 0
+        for start, end in matches:
+            if start >= last_end:
+                selected.append((start, end, text[start:end]))
+                last_end = end
+        return selected
+
+    def annotate(self, text: str) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        for _, _, zh in self.find(text):
+            found.setdefault(zh, self.terms[zh])
+        return found
+
+    def _add(self, term: str) -> None:
+        node = 0
+        for ch in term:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.lengths.append([])
+            node = nxt
+        self.lengths[node].append(len(term))
+
+    def _link(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.lengths[nxt] = self.lengths[nxt] + self.lengths[self.fail[nxt]]
+
+
+def _fingerprint(path: Path) -> Tuple[int, int, int]:
+    if not path.exists():
+        return (0, 0, 0)
+    stat = path.stat()
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def main() -> int:
+    args = parse_args()
+    matcher = GlossaryMatcher.load(Path(args.glossary).resolve())
+    print(json.dumps(matcher.annotate(args.text), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Indexed access to references/glossary.jsonl.
+
+The JSONL file stays the append-only source of truth. An index keyed by the
+zh term (latest entry wins) is cached next to it and refreshed incrementally
+by parsing only the lines appended since the last load. The index is
+rewritten only once that unsaved tail exceeds INDEX_SAVE_BYTES, so many
+small appends do not each rewrite it. Appends and compaction hold an
+exclusive lock so parallel jobs do not interleave writes.
+
+Usage:
+  python scripts/glossary_store.py --lookup 科研
+  python scripts/glossary_store.py --conflicts
+  python scripts/glossary_store.py --compact
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+DEFAULT_GLOSSARY_PATH = Path(__file__).resolve().parents[1] / "references" / "glossary.jsonl"
+INDEX_VERSION = 1
+INDEX_SAVE_BYTES = 1024 * 1024
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Look up, inspect, or compact the glossary")
+    parser.add_argument("--glossary", default=str(DEFAULT_GLOSSARY_PATH), help="Path to glossary.jsonl")
+    parser.add_argument("--lookup", action="append", default=[], help="zh term to look up (repeatable)")
+    parser.add_argument("--conflicts", action="store_true", help="List zh terms with more than one en translation")
+    parser.add_argument("--compact", action="store_true", help="Rewrite the glossary with one latest entry per zh term")
+    return parser.parse_args()
+
+
+class GlossaryStore:
+    def __init__(self, path: Path = DEFAULT_GLOSSARY_PATH) -> None:
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".index.json")
+        self.lock_path = self.path.with_suffix(".lock")
+        self.entries: Dict[str, dict] = {}
+        self.conflicts: Dict[str, List[str]] = {}
+        self.offset = 0
+        self.saved_offset = 0
+        self.inode = 0
+        self.refresh()
+
+    def lookup(self, zh: str) -> Optional[dict]:
+        entry = self.entries.get(zh)
+        return _public(entry) if entry else None
+
+    def translate(self, zh: str) -> Optional[str]:
+        entry = self.entries.get(zh)
+        return entry["en"] if entry else None
+
+    def refresh(self) -> None:
+        # Compaction replaces the file, so a new inode means a full reload.
+        stat = self.path.stat() if self.path.exists() else None
+        size, inode = (stat.st_size, stat.st_ino) if stat else (0, 0)
+        if inode != self.inode or size < self.offset:
+            self._load_index(size, inode)
+        if size > self.offset:
+            self._read_tail()
+
+    def append(self, entries: Iterable[dict]) -> List[dict]:
+        # Entries identical to the current latest translation are skipped.
+        with self._locked():
+            self.refresh()
+            fresh: List[dict] = []
+            for entry in entries:
+                current = self.entries.get(entry["zh"])
+                if current and current["en"] == entry["en"]:
+                    continue
+                fresh.append(entry)
+                self._index_entry(entry)
+            if fresh:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                payload = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in fresh)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                stat = self.path.stat()
+                self.offset, self.inode = stat.st_size, stat.st_ino
+                self._save_index_if_stale()
+        return fresh
+
+    def compact(self) -> Dict[str, int]:
+        # One line per term; a conflicting term lists its superseded
+        # translations under "alternatives", so --conflicts still reports them.
+        with self._locked():
+            self.refresh()
+            before = sum(1 for _ in self._iter_lines(0))
+            ordered = sorted(self.entries.values(), key=lambda e: e.get("_pos", 0))
+            after = 0
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                for entry in ordered:
+                    record = _public(entry)
+                    record.pop("alternatives", None)
+                    alternatives = [en for en in self.conflicts.get(entry["zh"], []) if en != entry["en"]]
+                    if alternatives:
+                        record["alternatives"] = alternatives
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    after += 1
+            tmp_path.replace(self.path)
+            self.inode = self.path.stat().st_ino
+            self.entries, self.conflicts, self.offset = {}, {}, 0
+            self._read_tail()
+            self._save_index()
+        return {"before": before, "after": after, "terms": len(self.entries), "conflicts": len(self.conflicts)}
+
+    def _index_entry(self, entry: dict, pos: Optional[int] = None) -> None:
+        zh = entry["zh"]
+        previous = self.entries.get(zh)
+        # Compacted entries carry their superseded translations as alternatives.
+        earlier = ([previous["en"]] if previous else []) + entry.get("alternatives", [])
+        if any(en != entry["en"] for en in earlier):
+            seen = self.conflicts.setdefault(zh, [])
+            for en in earlier + [entry["en"]]:
+                if en not in seen:
+                    seen.append(en)
+        record = dict(entry)
+        record["_pos"] = pos if pos is not None else self.offset
+        self.entries[zh] = record
+
+    def _iter_lines(self, offset: int) -> Iterator[tuple]:
+        if not self.path.exists():
+            return
+        with self.path.open("rb") as f:
+            f.seek(offset)
+            pos = offset
+            for raw in f:
+                line_pos = pos
+                pos += len(raw)
+                if not raw.endswith(b"\n"):
+                    # Partial line from a concurrent writer; pick it up next time.
+                    return
+                if raw.strip():
+                    yield line_pos, pos, json.loads(raw)
+
+    def _read_tail(self) -> None:
+        for line_pos, end, entry in self._iter_lines(self.offset):
+            self._index_entry(entry, line_pos)
+            self.offset = end
+        self._save_index_if_stale()
+
+    def _load_index(self, size: int, inode: int) -> None:
+        self.entries, self.conflicts, self.offset, self.saved_offset = {}, {}, 0, 0
+        self.inode = inode
+        if not self.index_path.exists():
+            return
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except ValueError:
+            return
+        if data.get("version") != INDEX_VERSION or data.get("inode") != inode or data.get("offset", 0) > size:
+            return
+        self.entries = data["entries"]
+        self.conflicts = data["conflicts"]
+        self.offset = self.saved_offset = data["offset"]
+
+    def _save_index_if_stale(self) -> None:
+        if self.offset - self.saved_offset >= INDEX_SAVE_BYTES:
+            self._save_index()
+
+    def _save_index(self) -> None:
+        if not self.path.exists():
+            return
+        payload = {
+            "version": INDEX_VERSION,
+            "inode": self.inode,
+            "offset": self.offset,
+            "entries": self.entries,
+            "conflicts": self.conflicts,
+        }
+        tmp_path = self.index_path.with_name(self.index_path.name + f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(self.index_path)
+        self.saved_offset = self.offset
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock_path.open("w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _public(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if not k.startswith("_")}
+
+
+def main() -> int:
+    args = parse_args()
+    store = GlossaryStore(Path(args.glossary).resolve())
+
+    if args.compact:
+        print(json.dumps(store.compact()))
+    for zh in args.lookup:
+        entry = store.lookup(zh)
+        print(json.dumps({"zh": zh, "entry": entry}, ensure_ascii=False))
+    if args.conflicts:
+        print(json.dumps(store.conflicts, ensure_ascii=False))
+    if not (args.compact or args.lookup or args.conflicts):
+        print(json.dumps({"entries": len(store.entries), "conflicts": len(store.conflicts)}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Mask inline Markdown that must not be translated.
+
+Inline code spans, link and image targets, reference labels, autolinks, bare
+URLs, HTML tags and multi-character emphasis markers are replaced with
+compact sentinels like ⟦1⟧ so the block text sent for translation carries
+only human-readable content. insert_en_blocks.py restores them. Only the
+"(url)" or "[label]" after a link's "]" is masked, so the translator still
+sees balanced "[text]" brackets.
+
+Usage:
+  python scripts/inline_mask.py --text "见 [文档](https://example.com/docs) 和 `make test`"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from typing import Dict, List, Tuple
+
+MASK_RE = re.compile(
+    r"(`+).+?\1"  # inline code spans
+    r"|(?<=\])\((?:[^()\s]|\([^()]*\))*(?:\s+\"[^\"]*\")?\)"  # link and image targets
+    r"|(?<=\])\[[^\]]*\]"  # reference-style link labels
+    r"|<https?://[^>\s]+>"  # autolinks
+    r"|</?[A-Za-z][^<>]*>"  # HTML tags
+    r"|https?://[^\s<>()\[\]\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]+"  # bare URLs
+    r"|\*\*|__|~~"  # emphasis markers
+)
+SENTINEL_RE = re.compile(r"⟦(\d+)⟧")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Show the masked form of a Markdown line")
+    parser.add_argument("--text", required=True, help="Markdown text to mask")
+    return parser.parse_args()
+
+
+def mask_inline(text: str) -> Tuple[str, Dict[str, str]]:
+    if "⟦" in text:
+        return text, {}
+    masks: Dict[str, str] = {}
+    sentinels: Dict[str, str] = {}
+
+    def replace(m: re.Match) -> str:
+        piece = m.group(0)
+        sentinel = sentinels.get(piece)
+        if sentinel is None:
+            sentinel = f"⟦{len(sentinels) + 1}⟧"
+            sentinels[piece] = sentinel
+            masks[sentinel] = piece
+        return sentinel
+
+    return MASK_RE.sub(replace, text), masks
+
+
+def unmask_inline(text: str, masks: Dict[str, str]) -> Tuple[str, List[str]]:
+    # Returns the restored text and the sentinels the translation dropped.
+    if not masks:
+        return text, []
+    seen = set()
+
+    def replace(m: re.Match) -> str:
+        sentinel = m.group(0)
+        seen.add(sentinel)
+        return masks.get(sentinel, sentinel)
+
+    restored = SENTINEL_RE.sub(replace, text)
+    return restored, [s for s in masks if s not in seen]
+
+
+def lost_sentinels(source: str, translation: str) -> List[str]:
+    # Sentinels of the masked source text that a translation does not keep.
+    kept = set(SENTINEL_RE.findall(translation))
+    return [m.group(0) for m in SENTINEL_RE.finditer(source) if m.group(1) not in kept]
+
+
+def main() -> int:
+    args = parse_args()
+    masked, masks = mask_inline(args.text)
+    print(json.dumps({"text": masked, "masks": masks}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
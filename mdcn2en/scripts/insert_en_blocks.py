@@ -2,64 +2,182 @@
 """Insert translated English blocks into a skeleton Markdown file.
 
 Usage:
-  python scripts/insert_en_blocks.py --input path/to/foo.en.md --translations path/to/blocks.json
+  python scripts/insert_en_blocks.py --input path/to/foo.en.md --translations path/to/translated.jsonl
+  ... | python scripts/insert_en_blocks.py --input path/to/foo.en.md --translations -
 
 Translations file formats supported:
 - JSON list: [{"index": 1, "text": "..."}, {"placeholder": "[[...]]", "text": "..."}]
 - JSON dict: {"[[CN2EN_BLOCK_0001]]": "..."}
-- JSONL: one JSON object per line with the same fields as list entries
+- JSONL: one JSON object per line with the same fields as list entries (also
+  accepted on stdin with --translations -)
+- Batch manifest: manifest.json written by extract_blocks_from_json.py --batch-dir;
+  each batch's translated output file (batch-NNNN.en.json) is loaded in turn
+
+The blocks file written by extract_cn_blocks.py (default: foo.en.blocks.jsonl
+next to the skeleton, or a legacy foo.en.blocks.json) supplies translations
+pre-filled from the translation memory, and the source text of newly
+translated blocks is recorded back into the memory (disable with --no-memory).
+Its "masks" fields are used to restore inline code, URLs and tags that were
+masked as ⟦n⟧ sentinels. A translation that lost a sentinel is listed under
+"dropped_masks" and its placeholder is left in place (use
+--allow-dropped-masks to insert it anyway); it is never written back or
+recorded into the memory. Applied translations are streamed back into the
+blocks file so that extract_cn_blocks.py --update can keep them when the
+source changes.
 """
 
 from __future__ import annotations
 
 import argparse
 import json
+import re
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+from blocks_io import MANIFEST_KIND, default_blocks_path, is_stdio, iter_records, open_input, read_blocks, write_blocks
+from inline_mask import unmask_inline
+from translation_memory import DEFAULT_MEMORY_PATH, TranslationMemory
+
+PLACEHOLDER_RE = re.compile(r"\[\[CN2EN_BLOCK_\d+\]\]")
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Insert translated blocks into Markdown skeleton")
     parser.add_argument("--input", required=True, help="Path to skeleton .en.md file")
-    parser.add_argument("--translations", required=True, help="Path to translations json/jsonl")
+    parser.add_argument("--translations", required=True, help="Path to translations json/jsonl, or - for stdin")
     parser.add_argument("--output", help="Optional output path (default: overwrite input)")
+    parser.add_argument("--blocks", help="Optional path to blocks file (default: sibling .blocks.jsonl)")
+    parser.add_argument("--memory", default=str(DEFAULT_MEMORY_PATH), help="Path to translation memory database")
+    parser.add_argument("--no-memory", action="store_true", help="Do not record translations into memory")
+    parser.add_argument(
+        "--allow-dropped-masks",
+        action="store_true",
+        help="Insert translations that lost a ⟦n⟧ sentinel instead of leaving their placeholder",
+    )
     return parser.parse_args()
 
 
+def record_placeholder(obj: dict) -> str:
+    if "placeholder" in obj:
+        return obj["placeholder"]
+    return f"[[CN2EN_BLOCK_{int(obj['index'] if 'index' in obj else obj['id']):04d}]]"
+
+
 def load_translations(path: Path) -> Dict[str, str]:
-    text = path.read_text(encoding="utf-8")
-    translations: Dict[str, str] = {}
+    base = Path.cwd() if is_stdio(path) else path.parent
+    with open_input(path) as f:
+        return translations_from_records(iter_records(f), base)
 
-    if path.suffix == ".jsonl":
-        for line in text.splitlines():
-            if not line.strip():
-                continue
-            obj = json.loads(line)
-            if "placeholder" in obj:
-                translations[obj["placeholder"]] = obj["text"]
-            elif "index" in obj:
-                placeholder = f"[[CN2EN_BLOCK_{int(obj['index']):04d}]]"
-                translations[placeholder] = obj["text"]
-            elif "text" in obj and "id" in obj:
-                placeholder = f"[[CN2EN_BLOCK_{int(obj['id']):04d}]]"
-                translations[placeholder] = obj["text"]
-        return translations
-
-    obj = json.loads(text)
-    if isinstance(obj, dict):
-        for k, v in obj.items():
-            translations[str(k)] = str(v)
-        return translations
-    if isinstance(obj, list):
-        for item in obj:
-            if "placeholder" in item:
-                translations[item["placeholder"]] = item["text"]
-            elif "index" in item:
-                placeholder = f"[[CN2EN_BLOCK_{int(item['index']):04d}]]"
-                translations[placeholder] = item["text"]
-        return translations
-
-    raise SystemExit("Unsupported translations file format")
+
+def translations_from_records(records: Iterable[dict], base: Optional[Path] = None) -> Dict[str, str]:
+    # Records are streamed, so JSONL, JSON lists and single JSON objects
+    # (a placeholder dict or a batch manifest) share one reader.
+    translations: Dict[str, str] = {}
+    for obj in records:
+        if obj.get("kind") == MANIFEST_KIND:
+            outputs = [(base or Path.cwd()) / batch["output"] for batch in obj.get("batches", [])]
+            absent = [str(p) for p in outputs if not p.exists()]
+            if absent:
+                raise SystemExit("Batch translations not found: " + ", ".join(absent[:5]))
+            for output in outputs:
+                translations.update(load_translations(output))
+        elif "text" in obj and ("placeholder" in obj or "index" in obj or "id" in obj):
+            translations[record_placeholder(obj)] = obj["text"]
+        elif all(PLACEHOLDER_RE.fullmatch(str(k)) for k in obj):
+            for k, v in obj.items():
+                translations[str(k)] = str(v)
+        else:
+            raise SystemExit("Unsupported translations file format")
+    return translations
+
+
+def merge_translations(
+    translations: Dict[str, str],
+    blocks: Iterable[dict],
+    allow_dropped: bool = False,
+) -> Tuple[Dict[str, str], List[str]]:
+    # New translations win over pre-filled ones; masked sentinels are restored.
+    # Translations that lost a sentinel are left out unless allow_dropped.
+    merged: Dict[str, str] = {}
+    dropped: List[str] = []
+    for b in blocks:
+        placeholder = b["placeholder"]
+        text = translations.get(placeholder, b.get("translation"))
+        if text is None:
+            continue
+        if b.get("masks"):
+            text, lost = unmask_inline(text, b["masks"])
+            if lost:
+                dropped.append(placeholder)
+                if not allow_dropped:
+                    continue
+        merged[placeholder] = text
+    skipped = set(dropped)
+    for placeholder, text in translations.items():
+        if placeholder not in skipped:
+            merged.setdefault(placeholder, text)
+    return merged, dropped
+
+
+def record_applied(
+    blocks: Iterable[dict],
+    translations: Dict[str, str],
+    used: Set[str],
+    applied: List[Tuple[str, str]],
+    dropped: Iterable[str] = (),
+) -> Iterator[dict]:
+    skipped = set(dropped)
+    for b in blocks:
+        placeholder = b["placeholder"]
+        if placeholder in translations and placeholder in used and placeholder not in skipped:
+            b["translation"] = translations[b["placeholder"]]
+            applied.append((b["text"], b["translation"]))
+        yield b
+
+
+def insert_blocks(lines: Iterable[str], translations: Dict[str, str], out: TextIO) -> Tuple[Set[str], List[str]]:
+    used: Set[str] = set()
+    missing: List[str] = []
+
+    def replace(m: re.Match) -> str:
+        placeholder = m.group(0)
+        text = translations.get(placeholder)
+        if text is None:
+            missing.append(placeholder)
+            return placeholder
+        used.add(placeholder)
+        return text
+
+    for line in lines:
+        out.write(PLACEHOLDER_RE.sub(replace, line) if "[[CN2EN_BLOCK_" in line else line)
+    return used, missing
+
+
+def insert_file(
+    input_path: Path,
+    translations: Dict[str, str],
+    blocks_path: Path,
+    output_path: Path,
+    allow_dropped: bool = False,
+) -> Tuple[dict, List[Tuple[str, str]]]:
+    merged, dropped = merge_translations(translations, read_blocks(blocks_path), allow_dropped)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+
+    with input_path.open("r", encoding="utf-8", newline="") as src, tmp_path.open("w", encoding="utf-8", newline="") as out:
+        used, missing = insert_blocks(src, merged, out)
+
+    unused = [p for p in translations.keys() if p not in used and p not in dropped]
+    if unused:
+        tmp_path.unlink()
+        raise SystemExit("Some placeholders not found in input: " + ", ".join(unused[:5]))
+    tmp_path.replace(output_path)
+
+    applied: List[Tuple[str, str]] = []
+    if blocks_path.exists():
+        write_blocks(blocks_path, record_applied(read_blocks(blocks_path), translations, used, applied, dropped))
+
+    summary = {"output": str(output_path), "count": len(translations), "missing": missing, "dropped_masks": dropped}
+    return summary, applied
 
 
 def main() -> int:
@@ -68,24 +186,21 @@ def main() -> int:
     if not input_path.exists():
         raise SystemExit(f"Input not found: {input_path}")
 
-    translations_path = Path(args.translations).resolve()
-    if not translations_path.exists():
+    translations_path = Path(args.translations) if is_stdio(args.translations) else Path(args.translations).resolve()
+    if not is_stdio(translations_path) and not translations_path.exists():
         raise SystemExit(f"Translations not found: {translations_path}")
 
     translations = load_translations(translations_path)
-    content = input_path.read_text(encoding="utf-8")
-
-    missing = [p for p in translations.keys() if p not in content]
-    if missing:
-        raise SystemExit("Some placeholders not found in input: " + ", ".join(missing[:5]))
-
-    for placeholder, text in translations.items():
-        content = content.replace(placeholder, text)
-
+    blocks_path = Path(args.blocks).resolve() if args.blocks else default_blocks_path(input_path)
     output_path = Path(args.output).resolve() if args.output else input_path
-    output_path.write_text(content, encoding="utf-8")
-
-    print(json.dumps({"output": str(output_path), "count": len(translations)}))
+    summary, applied = insert_file(input_path, translations, blocks_path, output_path, args.allow_dropped_masks)
+
+    if applied and not args.no_memory:
+        with TranslationMemory(Path(args.memory).resolve()) as memory:
+            for zh, en in applied:
+                memory.record(zh, en)
+            summary["memory"] = memory.stats()
+    print(json.dumps(summary))
     return 0
 
 
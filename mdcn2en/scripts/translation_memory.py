@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Persistent translation memory for Chinese Markdown blocks.
+
+Blocks are keyed by a hash of their normalized text (NFKC, collapsed
+whitespace). extract_cn_blocks.py pre-fills exact matches and
+insert_en_blocks.py records applied translations. Translations that lost
+one of the block's ⟦n⟧ mask sentinels are neither recorded nor returned.
+
+Usage:
+  python scripts/translation_memory.py --stats
+  python scripts/translation_memory.py --lookup "中文文本"
+
+Storage:
+  - SQLite database at references/translation_memory.db by default.
+  - Bounded by --max-entries; least recently used entries are evicted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import unicodedata
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from inline_mask import lost_sentinels
+
+DEFAULT_MEMORY_PATH = Path(__file__).resolve().parents[1] / "references" / "translation_memory.db"
+DEFAULT_MAX_ENTRIES = 200_000
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    key TEXT PRIMARY KEY,
+    zh TEXT NOT NULL,
+    en TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    added_at TEXT NOT NULL,
+    last_used TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS memory_last_used ON memory (last_used);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Inspect the block translation memory")
+    parser.add_argument("--memory", default=str(DEFAULT_MEMORY_PATH), help="Path to translation memory database")
+    parser.add_argument("--stats", action="store_true", help="Print entry count and hit/miss totals")
+    parser.add_argument("--lookup", help="Look up the translation of a Chinese block")
+    return parser.parse_args()
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def normalize_text(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def memory_key(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    def __init__(self, path: Path = DEFAULT_MEMORY_PATH, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.conn = sqlite3.connect(str(self.path), timeout=30)
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> "TranslationMemory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def lookup(self, text: str) -> Optional[str]:
+        key = memory_key(text)
+        row = self.conn.execute("SELECT en FROM memory WHERE key = ?", (key,)).fetchone()
+        if row is None or lost_sentinels(text, row[0]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute(
+            "UPDATE memory SET hits = hits + 1, last_used = ? WHERE key = ?",
+            (now_iso(), key),
+        )
+        return row[0]
+
+    def record(self, zh: str, en: str) -> None:
+        if lost_sentinels(zh, en):
+            return
+        stamp = now_iso()
+        self.conn.execute(
+            "INSERT INTO memory (key, zh, en, added_at, last_used) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET en = excluded.en, last_used = excluded.last_used",
+            (memory_key(zh), normalize_text(zh), en, stamp, stamp),
+        )
+        self.recorded += 1
+
+    def stats(self) -> Dict[str, int]:
+        totals = dict(self.conn.execute("SELECT name, value FROM stats").fetchall())
+        entries = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+            "total_hits": totals.get("hits", 0) + self.hits,
+            "total_misses": totals.get("misses", 0) + self.misses,
+        }
+
+    def close(self) -> None:
+        for name, value in (("hits", self.hits), ("misses", self.misses)):
+            self.conn.execute(
+                "INSERT INTO stats (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, value),
+            )
+        self.hits = self.misses = 0
+        self.evict()
+        self.conn.commit()
+        self.conn.close()
+
+    def evict(self) -> None:
+        overflow = self.conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self.conn.execute(
+                "DELETE FROM memory WHERE key IN (SELECT key FROM memory ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+
+
+def main() -> int:
+    args = parse_args()
+    memory_path = Path(args.memory).resolve()
+    if not memory_path.exists():
+        raise SystemExit(f"Translation memory not found: {memory_path}")
+
+    with TranslationMemory(memory_path) as memory:
+        if args.lookup:
+            print(json.dumps({"zh": args.lookup, "en": memory.lookup(args.lookup)}, ensure_ascii=False))
+        if args.stats or not args.lookup:
+            print(json.dumps(memory.stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())